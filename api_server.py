@@ -1,147 +1,146 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
-import subprocess
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import json
+import math
 import os
-import sys
-import threading
 import time
-import queue
+
+import pipeline_workers
+from article_store import get_store
+from artifacts import ArtifactStore
+from audio_encoding import available_formats, mime_type
+from audio_segments import SEGMENT_MANIFEST, read_manifest, read_segment_pcm, streaming_wav_header
+from jobs import JobManager
+
+FETCH_TIMEOUT = 1500  # 25 minutes
+BROADCAST_TIMEOUT = 600  # 10 minutes
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+# Background pipeline jobs; workers report progress into the job registry
+jobs = JobManager()
+pipeline_workers.set_progress_handler(jobs.progress)
+
+# Every request writes into its own artifact directory, so concurrent
+# pipelines never overwrite each other's articles.csv or audio
+artifacts = ArtifactStore()
+ARTICLES_ARTIFACT = 'articles.csv'
+BROADCAST_ARTIFACT = 'broadcast.wav'
+
+# Seconds a long-poll or SSE request waits for the next event before
+# returning empty-handed (long-poll) or sending a keep-alive comment (SSE),
+# and the longest wait a long-poll may ask for with ?wait=
+EVENT_WAIT = 15
+MAX_EVENT_WAIT = 60
+
+# Longest broadcast, in minutes, a request may ask for
+MAX_DURATION = 60
+
+class RequestError(ValueError):
+    """A request body that can't be run; answered with a 400 carrying `details`"""
+
+    def __init__(self, message, **details):
+        super().__init__(message)
+        self.details = details
+
+def request_data():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        raise RequestError('Request body must be a JSON object')
+    return data
+
+def fetch_params(data):
+    """Validate a fetch-articles request; returns (topics, api_key)"""
+    topics = data.get('topics', [])
+    api_key = data.get('api_key', '')
+    if not isinstance(topics, list) or not all(isinstance(topic, str) for topic in topics):
+        raise RequestError('topics must be a list of strings')
+    if not api_key or not isinstance(api_key, str):
+        raise RequestError('API key is required')
+    return topics, api_key
+
+def broadcast_params(data):
+    """Validate a generate-broadcast request; returns (urls, api_key, duration, audio_format)"""
+    urls = data.get('urls', [])
+    api_key = data.get('api_key', '')
+    duration = data.get('duration', 5)  # Default duration is 5 minutes
+    audio_format = data.get('format', 'wav')
+    if not urls:
+        raise RequestError('No URLs provided')
+    if not isinstance(urls, list) or not all(isinstance(url, str) for url in urls):
+        raise RequestError('urls must be a list of strings')
+    if not api_key or not isinstance(api_key, str):
+        raise RequestError('API key is required')
+    if isinstance(duration, bool) or (isinstance(duration, float) and not duration.is_integer()):
+        duration = None
+    else:
+        try:
+            duration = int(duration)
+        except (TypeError, ValueError):
+            duration = None
+    if duration is None or not 1 <= duration <= MAX_DURATION:
+        raise RequestError(f'duration must be a whole number of minutes from 1 to {MAX_DURATION}')
+    if audio_format not in available_formats():
+        raise RequestError(f"Unsupported audio format '{audio_format}'", formats=available_formats())
+    return urls, api_key, duration, audio_format
+
+@app.errorhandler(RequestError)
+def bad_request(error):
+    return jsonify(dict(error.details, error=str(error))), 400
+
 @app.route('/health')
 def health_check():
     return jsonify({'status': 'healthy', 'service': 'Briefly AI API Server'}), 200
 
+@app.route('/api/audio-formats')
+def audio_formats():
+    return jsonify({'formats': available_formats()})
+
 @app.route('/api/fetch-articles', methods=['POST'])
 def fetch_articles():
+    topics, api_key = fetch_params(request_data())
     try:
-        data = request.json
-        topics = data.get('topics', [])
-        api_key = data.get('api_key', '')
-        
-            
-        if not api_key:
-            return jsonify({'error': 'API key is required'}), 400
-        
         print(f"Received topics: {topics}", flush=True)
         print("API key provided (hidden for security)", flush=True)
+        print("Starting article pipeline - this may take up to 25 minutes...", flush=True)
         
-        # Execute the Python script with topics and API key
-        cmd = ['python3', '-u', 'find-articles.py', '--api-key', api_key] + topics  # -u for unbuffered output
-        
-        print(f"Executing command: {' '.join(cmd)}", flush=True)
-        print("Starting script execution - this may take up to 25 minutes...", flush=True)
-        
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,  # Line buffered
-            universal_newlines=True,
-            cwd=os.path.dirname(os.path.abspath(__file__)),
-            env={**os.environ, 'PYTHONUNBUFFERED': '1'}  # Force unbuffered output
-        )
-        
-        # Queue to collect output lines
-        output_queue = queue.Queue()
-        output_lines = []
-        
-        def read_stdout():
-            """Read stdout in a separate thread"""
-            try:
-                for line in iter(process.stdout.readline, ''):
-                    if line:
-                        line = line.strip()
-                        print(f"[SCRIPT] {line}", flush=True)
-                        output_queue.put(('stdout', line))
-            except Exception as e:
-                print(f"Error reading stdout: {e}", flush=True)
-            finally:
-                process.stdout.close()
-        
-        def read_stderr():
-            """Read stderr in a separate thread"""
-            try:
-                for line in iter(process.stderr.readline, ''):
-                    if line:
-                        line = line.strip()
-                        print(f"[SCRIPT-ERR] {line}", flush=True)
-                        output_queue.put(('stderr', line))
-            except Exception as e:
-                print(f"Error reading stderr: {e}", flush=True)
-            finally:
-                process.stderr.close()
-        
-        # Start threads to read output
-        stdout_thread = threading.Thread(target=read_stdout)
-        stderr_thread = threading.Thread(target=read_stderr)
-        stdout_thread.daemon = True
-        stderr_thread.daemon = True
-        stdout_thread.start()
-        stderr_thread.start()
-        
-        start_time = time.time()
+        # Run the pipeline on a warm worker process
+        artifact_id, output_dir = artifacts.create()
+        try:
+            future = pipeline_workers.submit_fetch_articles(topics, api_key, os.path.join(output_dir, ARTICLES_ARTIFACT),
+                                                            timeout=FETCH_TIMEOUT)
+        except Exception:
+            artifacts.release(artifact_id)
+            raise
+        future.add_done_callback(lambda _: artifacts.release(artifact_id))
         
         try:
-            # Wait for process to complete or timeout
-            while process.poll() is None:
-                # Collect any queued output
-                try:
-                    while True:
-                        stream_type, line = output_queue.get_nowait()
-                        output_lines.append(line)
-                except queue.Empty:
-                    pass
-                
-                # Check for timeout (25 minutes = 1500 seconds)
-                if time.time() - start_time > 1500:
-                    print("Script execution timed out after 25 minutes", flush=True)
-                    process.kill()
-                    process.wait()
-                    return jsonify({
-                        'error': 'Script execution timed out after 25 minutes. The article fetching process is taking longer than expected.',
-                        'timeout': 1500
-                    }), 504
-                
-                time.sleep(0.1)  # Small delay to prevent busy waiting
-            
-            # Wait for threads to finish reading remaining output
-            stdout_thread.join(timeout=5)
-            stderr_thread.join(timeout=5)
-            
-            # Collect any remaining output from queue
-            try:
-                while True:
-                    stream_type, line = output_queue.get_nowait()
-                    output_lines.append(line)
-            except queue.Empty:
-                pass
-            
-            return_code = process.returncode
-            
-        except Exception as e:
-            print(f"Error during script execution: {str(e)}", flush=True)
-            if process.poll() is None:
-                process.kill()
-                process.wait()
-            raise e
+            # The timeout runs from when a worker starts the job; on timeout
+            # the worker process is stopped and replaced
+            outcome = future.result()
+        except FutureTimeoutError:
+            print("Script execution timed out after 25 minutes", flush=True)
+            return jsonify({
+                'error': 'Script execution timed out after 25 minutes. The article fetching process is taking longer than expected.',
+                'timeout': FETCH_TIMEOUT
+            }), 504
         
-        full_output = '\n'.join(output_lines)
-        print(f"Script completed with return code: {return_code}", flush=True)
+        print(f"Article pipeline completed (success: {outcome['success']})", flush=True)
         
-        if return_code != 0:
+        if not outcome['success']:
             return jsonify({
-                'error': f'Script failed with return code {return_code}',
-                'output': full_output
+                'error': f"Article pipeline failed: {outcome['error']}",
+                'output': outcome['output']
             }), 500
         
         return jsonify({
             'success': True,
             'message': 'Articles fetched successfully',
-            'output': full_output
+            'artifact_id': artifact_id,
+            'csv_url': artifact_url(artifact_id, ARTICLES_ARTIFACT),
+            'output': outcome['output']
         })
         
     except Exception as e:
@@ -150,148 +149,260 @@ def fetch_articles():
 
 @app.route('/api/generate-broadcast', methods=['POST'])
 def generate_broadcast():
+    urls, api_key, duration, audio_format = broadcast_params(request_data())
     try:
-        data = request.json
-        urls = data.get('urls', [])
-        api_key = data.get('api_key', '')
-        duration = data.get('duration', 5)  # Default duration is 5 minutes
-        
-        if not urls:
-            return jsonify({'error': 'No URLs provided'}), 400
-            
-        if not api_key:
-            return jsonify({'error': 'API key is required'}), 400
-        
         print(f"Received URLs for broadcast generation: {urls}", flush=True)
         print("API key provided (hidden for security)", flush=True)
-        
-        # Execute the generateBroadcast.py script with URLs and API key as arguments
-        cmd = ['python3', '-u', 'generateBroadcast.py', '--api-key', api_key, '--duration', str(duration)] + urls
-        
-        print(f"Executing command: {' '.join(cmd)}", flush=True)
         print("Starting broadcast generation...", flush=True)
         
-        # Run the script
-        import subprocess
-        import threading
-        import time
-        import queue
-        
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,  # Line buffered
-            universal_newlines=True,
-            cwd=os.path.dirname(os.path.abspath(__file__)),
-            env={**os.environ, 'PYTHONUNBUFFERED': '1'}  # Force unbuffered output
-        )
-        
-        # Queue to collect output lines
-        output_queue = queue.Queue()
-        output_lines = []
-        
-        def read_stdout():
-            """Read stdout in a separate thread"""
-            try:
-                for line in iter(process.stdout.readline, ''):
-                    if line:
-                        line = line.strip()
-                        print(f"[BROADCAST] {line}", flush=True)
-                        output_queue.put(('stdout', line))
-            except Exception as e:
-                print(f"Error reading stdout: {e}", flush=True)
-            finally:
-                process.stdout.close()
-        
-        def read_stderr():
-            """Read stderr in a separate thread"""
-            try:
-                for line in iter(process.stderr.readline, ''):
-                    if line:
-                        line = line.strip()
-                        print(f"[BROADCAST-ERR] {line}", flush=True)
-                        output_queue.put(('stderr', line))
-            except Exception as e:
-                print(f"Error reading stderr: {e}", flush=True)
-            finally:
-                process.stderr.close()
-        
-        # Start threads to read output
-        stdout_thread = threading.Thread(target=read_stdout)
-        stderr_thread = threading.Thread(target=read_stderr)
-        stdout_thread.daemon = True
-        stderr_thread.daemon = True
-        stdout_thread.start()
-        stderr_thread.start()
-        
-        start_time = time.time()
+        # Run the pipeline on a warm worker process
+        artifact_id, output_dir = artifacts.create()
+        try:
+            future = pipeline_workers.submit_generate_broadcast(urls, api_key, os.path.join(output_dir, BROADCAST_ARTIFACT), duration,
+                                                                audio_format=audio_format, timeout=BROADCAST_TIMEOUT)
+        except Exception:
+            artifacts.release(artifact_id)
+            raise
+        future.add_done_callback(lambda _: artifacts.release(artifact_id))
         
         try:
-            # Wait for process to complete with timeout (10 minutes for broadcast generation)
-            while process.poll() is None:
-                # Collect any queued output
-                try:
-                    while True:
-                        stream_type, line = output_queue.get_nowait()
-                        output_lines.append(line)
-                except queue.Empty:
-                    pass
-                
-                # Check for timeout (10 minutes = 600 seconds)
-                if time.time() - start_time > 600:
-                    print("Broadcast generation timed out after 10 minutes", flush=True)
-                    process.kill()
-                    process.wait()
-                    return jsonify({
-                        'error': 'Broadcast generation timed out after 10 minutes.',
-                        'timeout': 600
-                    }), 504
-                
-                time.sleep(0.1)  # Small delay to prevent busy waiting
-            
-            # Wait for threads to finish reading remaining output
-            stdout_thread.join(timeout=5)
-            stderr_thread.join(timeout=5)
-            
-            # Collect any remaining output from queue
-            try:
-                while True:
-                    stream_type, line = output_queue.get_nowait()
-                    output_lines.append(line)
-            except queue.Empty:
-                pass
-            
-            return_code = process.returncode
-            
-        except Exception as e:
-            print(f"Error during broadcast generation: {str(e)}", flush=True)
-            # Kill the process if it's still running
-            if process.poll() is None:
-                process.kill()
-                process.wait()
-            raise e
+            outcome = future.result()
+        except FutureTimeoutError:
+            print("Broadcast generation timed out after 10 minutes", flush=True)
+            return jsonify({
+                'error': 'Broadcast generation timed out after 10 minutes.',
+                'timeout': BROADCAST_TIMEOUT
+            }), 504
         
-        full_output = '\n'.join(output_lines)
-        print(f"Broadcast generation completed with return code: {return_code}", flush=True)
+        print(f"Broadcast generation completed (success: {outcome['success']})", flush=True)
         
-        if return_code != 0:
+        if not outcome['success']:
             return jsonify({
-                'error': f'Broadcast generation failed with return code {return_code}',
-                'output': full_output
+                'error': f"Broadcast generation failed: {outcome['error']}",
+                'output': outcome['output']
             }), 500
         
         return jsonify({
             'success': True,
             'message': 'Broadcast generated successfully',
-            'output': full_output
+            'artifact_id': artifact_id,
+            'audio_url': artifact_url(artifact_id, os.path.basename(outcome['result'])) if outcome['result'] else None,
+            'output': outcome['output']
         })
         
     except Exception as e:
         print(f"Unexpected error in broadcast generation: {str(e)}", flush=True)
         return jsonify({'error': str(e)}), 500
 
+def artifact_url(artifact_id, name):
+    return f'/api/artifacts/{artifact_id}/{name}'
+
+def start_job(job, submit):
+    """
+    Create `job`'s artifact directory and call submit(output_dir) to queue its
+    pipeline. If that fails, the job is marked failed and the directory
+    released, so neither waits forever on a pipeline that never started.
+    """
+    _, output_dir = artifacts.create(job.id)
+    try:
+        return submit(output_dir)
+    except Exception as e:
+        artifacts.release(job.id)
+        jobs.finish(job.id, False, error=str(e) or type(e).__name__)
+        raise
+
+def track_job(job, future, make_result):
+    """Mark `job` finished when its pipeline future completes, and release its artifact directory"""
+    def done(finished_future):
+        artifacts.release(job.id)
+        try:
+            outcome = finished_future.result()
+        except Exception as e:
+            jobs.finish(job.id, False, error=str(e) or type(e).__name__)
+            return
+        result = make_result(outcome['result']) if outcome['success'] else None
+        jobs.finish(job.id, outcome['success'], result=result, error=outcome.get('error'), output=outcome['output'])
+    future.add_done_callback(done)
+
+def job_links(job):
+    return {
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': f'/api/jobs/{job.id}',
+        'events_url': f'/api/jobs/{job.id}/events',
+    }
+
+@app.route('/api/jobs/fetch-articles', methods=['POST'])
+def submit_fetch_articles_job():
+    data = request_data()
+    topics, api_key = fetch_params(data)
+    try:
+        # stream: publish each topic's articles as a partial_result event as soon as it is ready
+        stream = bool(data.get('stream', False))
+
+        job = jobs.create('fetch-articles', {'topics': topics, 'stream': stream})
+        print(f"Queued article job {job.id} for topics: {topics}", flush=True)
+
+        future = start_job(job, lambda output_dir: pipeline_workers.submit_fetch_articles(
+            topics, api_key, os.path.join(output_dir, ARTICLES_ARTIFACT), job_id=job.id, stream=stream, timeout=FETCH_TIMEOUT))
+        track_job(job, future, lambda count: {'articles': count, 'csv_url': artifact_url(job.id, ARTICLES_ARTIFACT)})
+
+        return jsonify(job_links(job)), 202
+
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}", flush=True)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/generate-broadcast', methods=['POST'])
+def submit_generate_broadcast_job():
+    data = request_data()
+    urls, api_key, duration, audio_format = broadcast_params(data)
+    try:
+        # progressive: publish each synthesized part as a playable segment right away
+        progressive = bool(data.get('progressive', True))
+
+        job = jobs.create('generate-broadcast', {'urls': urls, 'duration': duration, 'progressive': progressive})
+        print(f"Queued broadcast job {job.id} for {len(urls)} URLs", flush=True)
+
+        future = start_job(job, lambda output_dir: pipeline_workers.submit_generate_broadcast(
+            urls, api_key, os.path.join(output_dir, BROADCAST_ARTIFACT), duration, job_id=job.id,
+            progressive=progressive, audio_format=audio_format, timeout=BROADCAST_TIMEOUT))
+        track_job(job, future, lambda path: {'audio_url': artifact_url(job.id, os.path.basename(path))} if path else None)
+
+        links = job_links(job)
+        if progressive:
+            links['segments_url'] = artifact_url(job.id, SEGMENT_MANIFEST)
+            links['stream_url'] = f'/api/artifacts/{job.id}/stream.wav'
+        return jsonify(links), 202
+
+    except Exception as e:
+        print(f"Unexpected error in broadcast generation: {str(e)}", flush=True)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    status = job.to_dict()
+    if request.args.get('output'):
+        status['output'] = job.output
+    return jsonify(status)
+
+@app.route('/api/jobs/<job_id>/events')
+def job_events(job_id):
+    """
+    Progress events for a job, as Server-Sent Events when the client asks for
+    text/event-stream, otherwise as a long-poll returning events after ?after=<id>
+    """
+    if jobs.get(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    try:
+        after = int(request.headers.get('Last-Event-ID', request.args.get('after', -1)))
+    except ValueError:
+        after = None
+    if after is None or after < -1:
+        return jsonify({'error': 'after and Last-Event-ID must be event ids (integers from -1)'}), 400
+
+    if 'text/event-stream' not in request.headers.get('Accept', ''):
+        try:
+            wait = float(request.args.get('wait', EVENT_WAIT))
+        except ValueError:
+            wait = None
+        if wait is None or not math.isfinite(wait):
+            return jsonify({'error': 'wait must be a number of seconds'}), 400
+        wait = min(max(wait, 0), MAX_EVENT_WAIT)
+        events, finished = jobs.events_since(job_id, after, timeout=wait)
+        return jsonify({'events': events, 'finished': finished})
+
+    def stream():
+        last_id = after
+        while True:
+            events, finished = jobs.events_since(job_id, last_id, timeout=EVENT_WAIT)
+            if not events and not finished:
+                yield ': keep-alive\n\n'
+                continue
+            for event in events:
+                last_id = event['id']
+                yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+            if finished:
+                return
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/articles')
+def list_articles():
+    """
+    Keyed reads from the article store: ?url=<url> (repeatable) for specific
+    articles, or ?topic=<topic>[&limit=N] for a topic's latest articles.
+    Article text is only included with ?text=1.
+    """
+    try:
+        store = get_store()
+        urls = request.args.getlist('url')
+        topic = request.args.get('topic')
+        if urls:
+            articles = store.get_articles(urls)
+        elif topic:
+            articles = store.articles_for_topic(topic, limit=request.args.get('limit', 50, type=int))
+        else:
+            return jsonify({'error': 'Provide url or topic'}), 400
+
+        if not request.args.get('text'):
+            for article in articles:
+                article.pop('text', None)
+        return jsonify({'articles': articles})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/artifacts/<artifact_id>/stream.wav')
+def stream_broadcast(artifact_id):
+    """
+    Play a progressive broadcast while it is still being synthesized: a single
+    chunked WAV stream that sends each segment, in order, as soon as it exists
+    """
+    directory = artifacts.directory(artifact_id)
+    if directory is None:
+        return jsonify({'error': 'Artifact not found'}), 404
+
+    def stream():
+        yield streaming_wav_header()
+        next_segment = 0
+        deadline = time.time() + BROADCAST_TIMEOUT
+        while time.time() < deadline:
+            # Checked before reading the manifest, so segments published just
+            # before the job finished are still sent. A job that ends before
+            # synthesis starts (no articles, no script) never writes a manifest.
+            job = jobs.get(artifact_id)
+            job_done = job is None or job.finished
+            manifest = read_manifest(directory) or {'segments': [], 'parts': None}
+            ready = {segment['index']: segment['name'] for segment in manifest['segments']}
+            while next_segment in ready:
+                yield read_segment_pcm(os.path.join(directory, ready[next_segment]))
+                next_segment += 1
+            if job_done or manifest.get('failed') or (manifest.get('complete') and next_segment >= manifest['parts']):
+                return
+            time.sleep(0.5)
+
+    return Response(stream_with_context(stream()), mimetype='audio/wav', headers={'Cache-Control': 'no-cache'})
+
+@app.route('/api/artifacts/<artifact_id>/<name>')
+def serve_artifact(artifact_id, name):
+    try:
+        artifact_path = artifacts.path(artifact_id, name)
+        if artifact_path is None:
+            return jsonify({'error': 'Artifact not found'}), 404
+        # conditional=True answers Range requests with 206 partial content, so players can seek
+        return send_file(artifact_path, mimetype=mime_type(artifact_path) if name.startswith('broadcast') else None, conditional=True)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/articles.csv')
 def serve_csv():
     try:
@@ -308,7 +419,7 @@ def serve_broadcast():
     try:
         wav_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Broadcast.wav')
         if os.path.exists(wav_path):
-            return send_file(wav_path, mimetype='audio/wav')
+            return send_file(wav_path, mimetype='audio/wav', conditional=True)
         else:
             return jsonify({'error': 'Broadcast file not found'}), 404
     except Exception as e:
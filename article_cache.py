@@ -0,0 +1,78 @@
+"""
+Persistent, URL-keyed cache of extracted article text
+"""
+
+import os
+import threading
+import time
+
+from storage import connect, evict_lru_rows
+
+DEFAULT_CACHE_DIR = os.environ.get('BRIEFLY_CACHE_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+
+
+class ArticleCache:
+    def __init__(self, path=None, ttl=24 * 60 * 60, max_entries=5000):
+        """
+        Open (or create) the article cache
+
+        Args:
+            path: SQLite file to store the cache in
+            ttl: Seconds an entry stays fresh after it was fetched
+            max_entries: Entries kept before the least recently used ones are evicted
+        """
+        self.path = path or os.path.join(DEFAULT_CACHE_DIR, 'articles.sqlite')
+        self.ttl = ttl
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        # One connection shared by the download threads, serialized by a lock
+        self._lock = threading.Lock()
+        self._conn = connect(self.path)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS articles (
+                   url TEXT PRIMARY KEY,
+                   title TEXT,
+                   text TEXT NOT NULL,
+                   fetched_at REAL NOT NULL,
+                   accessed_at REAL NOT NULL
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS articles_accessed_at ON articles (accessed_at)")
+        self._conn.commit()
+
+    def get(self, url):
+        """Return {'title', 'text', 'fetched_at'} for a fresh entry, or None"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT title, text, fetched_at FROM articles WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[2] > self.ttl:
+                self._conn.execute("DELETE FROM articles WHERE url = ?", (url,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE articles SET accessed_at = ? WHERE url = ?", (now, url))
+            self._conn.commit()
+        return {'title': row[0], 'text': row[1], 'fetched_at': row[2]}
+
+    def put(self, url, text, title=None):
+        """Store an extracted article and evict old entries if the cache is over size"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO articles (url, title, text, fetched_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (url, title, text, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM articles WHERE fetched_at < ?", (now - self.ttl,))
+        evict_lru_rows(self._conn, 'articles', 'url', self.max_entries)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,66 @@
+"""
+Binary storage for article embeddings: a contiguous float32 matrix (.npy)
+plus a JSON index mapping each article URL to its row
+"""
+
+import json
+import os
+
+import numpy as np
+
+
+def embeddings_paths(prefix):
+    """Return the (.npy, .json) file paths for an embeddings prefix"""
+    return prefix + '.npy', prefix + '.json'
+
+
+def save_embeddings(prefix, urls, embeddings):
+    """
+    Write embeddings as one float32 matrix with a URL -> row index
+
+    Args:
+        prefix: Path without extension, e.g. 'articles_embeddings'
+        urls: Article URLs, one per embedding (duplicates keep their first row)
+        embeddings: Sequence of equal-length vectors
+    """
+    rows = {}
+    vectors = []
+    for url, embedding in zip(urls, embeddings):
+        if url not in rows:
+            rows[url] = len(vectors)
+            vectors.append(embedding)
+    matrix = np.asarray(vectors, dtype=np.float32) if vectors else np.zeros((0, 0), dtype=np.float32)
+
+    matrix_path, index_path = embeddings_paths(prefix)
+    # Write to temporary files and swap them in so readers never see a partial file
+    np.save(matrix_path + '.tmp.npy', matrix)
+    with open(index_path + '.tmp', 'w') as f:
+        json.dump({'dim': matrix.shape[1], 'rows': rows}, f)
+    os.replace(matrix_path + '.tmp.npy', matrix_path)
+    os.replace(index_path + '.tmp', index_path)
+
+
+class ArticleEmbeddings:
+    def __init__(self, prefix):
+        """Open saved embeddings; the matrix is memory-mapped, not read into memory"""
+        matrix_path, index_path = embeddings_paths(prefix)
+        with open(index_path) as f:
+            index = json.load(f)
+        self.rows = index['rows']
+        self.dim = index['dim']
+        self.matrix = np.load(matrix_path, mmap_mode='r')
+
+    def __contains__(self, url):
+        return url in self.rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def get(self, url):
+        """Return the embedding for `url`, or None"""
+        row = self.rows.get(url)
+        return None if row is None else np.asarray(self.matrix[row])
+
+    def matrix_for(self, urls):
+        """Return a (len(urls), dim) float32 matrix for URLs that all have embeddings"""
+        return np.asarray(self.matrix[[self.rows[url] for url in urls]])
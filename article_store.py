@@ -0,0 +1,186 @@
+"""
+Indexed SQLite store of fetched articles, shared by find_articles,
+generateBroadcast and api_server
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from storage import connect, shared_instance
+
+DEFAULT_STORE_PATH = os.environ.get('BRIEFLY_STORE_PATH') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'articles.sqlite')
+
+ARTICLE_FIELDS = ['url', 'title', 'description', 'published date', 'publisher', 'text']
+
+
+def _published_at(value):
+    """Parse GNews' RFC 2822 'published date' into a sortable ISO timestamp"""
+    try:
+        return parsedate_to_datetime(value).isoformat()
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_text(value):
+    if value is None or (isinstance(value, float) and value != value):  # NaN from pandas
+        return None
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+
+class ArticleStore:
+    def __init__(self, path=None):
+        """
+        Open (or create) the article store
+
+        Args:
+            path: SQLite file to store articles in
+        """
+        self.path = path or DEFAULT_STORE_PATH
+        self._lock = threading.Lock()
+        self._conn = connect(self.path)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(
+            """CREATE TABLE IF NOT EXISTS articles (
+                   url TEXT PRIMARY KEY,
+                   title TEXT,
+                   description TEXT,
+                   published_date TEXT,
+                   published_at TEXT,
+                   publisher TEXT,
+                   text TEXT,
+                   fetched_at REAL NOT NULL
+               );
+               CREATE INDEX IF NOT EXISTS articles_published_at ON articles (published_at);
+               CREATE INDEX IF NOT EXISTS articles_fetched_at ON articles (fetched_at);
+
+               CREATE TABLE IF NOT EXISTS article_topics (
+                   url TEXT NOT NULL REFERENCES articles (url) ON DELETE CASCADE,
+                   topic TEXT NOT NULL,
+                   added_at REAL NOT NULL,
+                   PRIMARY KEY (url, topic)
+               );
+               CREATE INDEX IF NOT EXISTS article_topics_topic ON article_topics (topic, added_at);"""
+        )
+        self._conn.commit()
+
+    def save_articles(self, records):
+        """
+        Insert or update articles
+
+        Args:
+            records: Iterable of dicts with the ARTICLE_FIELDS keys and an optional 'topic'
+        """
+        now = time.time()
+        article_rows = []
+        topic_rows = []
+        for record in records:
+            published = _to_text(record.get('published date'))
+            article_rows.append((
+                record['url'],
+                _to_text(record.get('title')),
+                _to_text(record.get('description')),
+                published,
+                _published_at(published),
+                _to_text(record.get('publisher')),
+                _to_text(record.get('text')),
+                now,
+            ))
+            if _to_text(record.get('topic')):
+                topic_rows.append((record['url'], str(record['topic']), now))
+
+        with self._lock:
+            self._conn.executemany(
+                """INSERT INTO articles (url, title, description, published_date, published_at, publisher, text, fetched_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (url) DO UPDATE SET
+                       title = excluded.title, description = excluded.description,
+                       published_date = excluded.published_date, published_at = excluded.published_at,
+                       publisher = excluded.publisher, text = excluded.text, fetched_at = excluded.fetched_at""",
+                article_rows,
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO article_topics (url, topic, added_at) VALUES (?, ?, ?)",
+                topic_rows,
+            )
+            self._conn.commit()
+
+    def save_dataframe(self, df):
+        """Insert or update every row of an articles DataFrame"""
+        columns = [col for col in ARTICLE_FIELDS + ['topic'] if col in df.columns]
+        self.save_articles(df[columns].to_dict('records'))
+
+    def import_csv(self, csv_path):
+        """Load an existing articles.csv into the store"""
+        import pandas as pd
+
+        self.save_dataframe(pd.read_csv(csv_path))
+
+    def _rows_to_dicts(self, rows):
+        return [
+            {
+                'url': row['url'],
+                'title': row['title'],
+                'description': row['description'],
+                'published date': row['published_date'],
+                'publisher': row['publisher'],
+                'text': row['text'],
+                'topic': row['topic'],
+            }
+            for row in rows
+        ]
+
+    def get_articles(self, urls):
+        """Return the stored articles for `urls`, in the order given, skipping unknown URLs"""
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return []
+        placeholders = ','.join('?' * len(urls))
+        with self._lock:
+            rows = self._conn.execute(
+                f"""SELECT a.*, (SELECT topic FROM article_topics t WHERE t.url = a.url ORDER BY added_at DESC LIMIT 1) AS topic
+                    FROM articles a WHERE a.url IN ({placeholders})""",
+                urls,
+            ).fetchall()
+        by_url = {article['url']: article for article in self._rows_to_dicts(rows)}
+        return [by_url[url] for url in urls if url in by_url]
+
+    def articles_for_topic(self, topic, since=None, limit=None):
+        """Return the most recently added articles for `topic`, optionally only those added after `since` (epoch seconds)"""
+        query = """SELECT a.*, t.topic FROM article_topics t JOIN articles a ON a.url = t.url
+                   WHERE t.topic = ? AND t.added_at >= ? ORDER BY t.added_at DESC"""
+        params = [topic, since or 0]
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return self._rows_to_dicts(rows)
+
+    def sample_urls(self, limit=10):
+        """Return up to `limit` of the most recently fetched URLs"""
+        with self._lock:
+            rows = self._conn.execute("SELECT url FROM articles ORDER BY fetched_at DESC LIMIT ?", (limit,)).fetchall()
+        return [row['url'] for row in rows]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_stores = {}
+
+
+def get_store(path=None):
+    """Return this process's shared ArticleStore for `path`, opening it on first use"""
+    path = path or DEFAULT_STORE_PATH
+    return shared_instance(_stores, path, lambda: ArticleStore(path))
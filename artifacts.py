@@ -0,0 +1,99 @@
+"""
+Job-scoped output directories for pipeline artifacts (articles.csv,
+broadcast audio, ...) with size-bounded LRU eviction
+"""
+
+import os
+import re
+import shutil
+import threading
+import uuid
+
+from storage import lru_over_budget
+
+DEFAULT_ARTIFACTS_DIR = os.environ.get('BRIEFLY_ARTIFACTS_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'artifacts')
+DEFAULT_MAX_BYTES = int(os.environ.get('BRIEFLY_ARTIFACTS_MAX_BYTES', 2 * 1024 ** 3))
+
+_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]+$')
+_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_.-]+$')
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class ArtifactStore:
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Args:
+            root: Directory holding one subdirectory per artifact ID
+            max_bytes: Total size kept before least recently used artifacts are evicted
+        """
+        self.root = root or DEFAULT_ARTIFACTS_DIR
+        self.max_bytes = max_bytes
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._in_use = set()
+
+    def create(self, artifact_id=None):
+        """
+        Create an output directory and mark it in use (never evicted until released)
+
+        Returns:
+            (artifact_id, directory path)
+        """
+        artifact_id = artifact_id or uuid.uuid4().hex
+        if not _ID_PATTERN.match(artifact_id):
+            raise ValueError(f"Invalid artifact ID: {artifact_id}")
+        directory = os.path.join(self.root, artifact_id)
+        with self._lock:
+            self._in_use.add(artifact_id)
+            os.makedirs(directory, exist_ok=True)
+        self.evict()
+        return artifact_id, directory
+
+    def release(self, artifact_id):
+        """Allow an artifact to be evicted once it is no longer being written"""
+        with self._lock:
+            self._in_use.discard(artifact_id)
+        self.evict()
+
+    def directory(self, artifact_id):
+        """Return the directory of an existing artifact, or None"""
+        if not _ID_PATTERN.match(artifact_id):
+            return None
+        directory = os.path.join(self.root, artifact_id)
+        return directory if os.path.isdir(directory) else None
+
+    def path(self, artifact_id, name):
+        """Return the path of an existing artifact file, or None; counts as a use for LRU"""
+        if not _ID_PATTERN.match(artifact_id) or not _NAME_PATTERN.match(name):
+            return None
+        directory = os.path.join(self.root, artifact_id)
+        file_path = os.path.join(directory, name)
+        if not os.path.isfile(file_path):
+            return None
+        try:
+            os.utime(directory)
+        except OSError:
+            pass
+        return file_path
+
+    def evict(self):
+        """Remove least recently used artifact directories until under max_bytes"""
+        with self._lock:
+            entries = []
+            for artifact_id in os.listdir(self.root):
+                directory = os.path.join(self.root, artifact_id)
+                if os.path.isdir(directory):
+                    entries.append((os.path.getmtime(directory), artifact_id, _dir_size(directory)))
+            for artifact_id, size in lru_over_budget(entries, self.max_bytes, keep=self._in_use):
+                shutil.rmtree(os.path.join(self.root, artifact_id), ignore_errors=True)
+                print(f"Evicted artifact {artifact_id} ({size} bytes)", flush=True)
@@ -0,0 +1,85 @@
+"""
+Compress broadcast WAV files with a locally installed encoder (ffmpeg, or the
+flac command-line tool for FLAC)
+"""
+
+import os
+import shutil
+import subprocess
+
+# format -> (file extension, MIME type)
+AUDIO_FORMATS = {
+    'wav': ('wav', 'audio/wav'),
+    'flac': ('flac', 'audio/flac'),
+    'mp3': ('mp3', 'audio/mpeg'),
+    'opus': ('opus', 'audio/ogg'),
+}
+
+# Speech-tuned defaults for the lossy formats
+DEFAULT_BITRATES = {
+    'mp3': '64k',
+    'opus': '32k',
+}
+
+
+def available_formats():
+    """Formats that can be produced with the encoders installed on this machine"""
+    formats = ['wav']
+    has_ffmpeg = shutil.which('ffmpeg') is not None
+    if has_ffmpeg or shutil.which('flac'):
+        formats.append('flac')
+    if has_ffmpeg:
+        formats.extend(['mp3', 'opus'])
+    return formats
+
+
+def mime_type(path):
+    extension = os.path.splitext(path)[1].lstrip('.').lower()
+    for ext, mime in AUDIO_FORMATS.values():
+        if ext == extension:
+            return mime
+    return 'application/octet-stream'
+
+
+def _encoder_command(wav_path, output_path, audio_format, bitrate):
+    ffmpeg = shutil.which('ffmpeg')
+    if audio_format == 'flac' and not ffmpeg and shutil.which('flac'):
+        return ['flac', '--silent', '--force', '-o', output_path, wav_path]
+    if not ffmpeg:
+        return None
+    codec = {'flac': ['-c:a', 'flac'], 'mp3': ['-c:a', 'libmp3lame'], 'opus': ['-c:a', 'libopus', '-application', 'voip']}[audio_format]
+    if audio_format in DEFAULT_BITRATES:
+        codec += ['-b:a', bitrate or DEFAULT_BITRATES[audio_format]]
+    return [ffmpeg, '-y', '-loglevel', 'error', '-i', wav_path] + codec + [output_path]
+
+
+def encode_audio(wav_path, audio_format, bitrate=None, keep_wav=False):
+    """
+    Encode a WAV file into `audio_format`, next to the original.
+
+    Args:
+        wav_path: Source WAV file.
+        audio_format: One of AUDIO_FORMATS.
+        bitrate: Bitrate for lossy formats (e.g. '48k'); defaults per format.
+        keep_wav: Keep the source WAV after a successful encode.
+
+    Returns:
+        The path of the encoded file (wav_path itself for 'wav').
+    """
+    if audio_format not in AUDIO_FORMATS:
+        raise ValueError(f"Unsupported audio format '{audio_format}' (choose from {', '.join(AUDIO_FORMATS)})")
+    if audio_format == 'wav':
+        return wav_path
+
+    output_path = os.path.splitext(wav_path)[0] + '.' + AUDIO_FORMATS[audio_format][0]
+    command = _encoder_command(wav_path, output_path, audio_format, bitrate)
+    if command is None:
+        raise RuntimeError(f"No local encoder available for {audio_format} (install ffmpeg)")
+
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Encoding to {audio_format} failed: {result.stderr.strip()}")
+
+    if not keep_wav:
+        os.remove(wav_path)
+    return output_path
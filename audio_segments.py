@@ -0,0 +1,108 @@
+"""
+Progressive broadcast audio: each synthesized part is published as its own
+playable WAV segment, listed in a JSON manifest, as soon as it is ready
+"""
+
+import json
+import os
+import struct
+import wave
+
+SEGMENT_MANIFEST = 'segments.json'
+
+# Gemini TTS output: 16-bit mono PCM at 24 kHz
+SAMPLE_RATE = 24000
+CHANNELS = 1
+SAMPLE_WIDTH = 2
+
+
+def segment_name(index):
+    return f'segment_{index:03d}.wav'
+
+
+def write_wav(path, pcm, channels=CHANNELS, rate=SAMPLE_RATE, sample_width=SAMPLE_WIDTH):
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(sample_width)
+        wf.setframerate(rate)
+        wf.writeframes(pcm)
+
+
+def streaming_wav_header(channels=CHANNELS, rate=SAMPLE_RATE, sample_width=SAMPLE_WIDTH):
+    """WAV header for a stream of unknown length (sizes set to the maximum, as streaming players expect)"""
+    data_size = 0xFFFFFFFF - 36
+    return (
+        b'RIFF' + struct.pack('<I', 0xFFFFFFFF) + b'WAVE'
+        + b'fmt ' + struct.pack('<IHHIIHH', 16, 1, channels, rate, rate * channels * sample_width,
+                                channels * sample_width, sample_width * 8)
+        + b'data' + struct.pack('<I', data_size)
+    )
+
+
+def read_manifest(directory):
+    """Return the segment manifest in `directory`, or None if there isn't one yet"""
+    try:
+        with open(os.path.join(directory, SEGMENT_MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def read_segment_pcm(path):
+    with wave.open(path, 'rb') as wf:
+        return wf.readframes(wf.getnframes())
+
+
+class SegmentPublisher:
+    def __init__(self, directory, parts_count):
+        """
+        Args:
+            directory: Where segment files and the manifest are written
+            parts_count: Total number of parts the broadcast will have
+        """
+        self.directory = directory
+        self.parts_count = parts_count
+        self.segments = {}
+        self.complete = False
+        self.failed = None
+        os.makedirs(directory, exist_ok=True)
+        self._write_manifest()
+
+    def publish(self, index, pcm):
+        """Write part `index` as a standalone WAV segment and list it in the manifest"""
+        name = segment_name(index)
+        write_wav(os.path.join(self.directory, name), pcm)
+        self.segments[index] = {
+            'index': index,
+            'name': name,
+            'seconds': round(len(pcm) / (SAMPLE_RATE * CHANNELS * SAMPLE_WIDTH), 2),
+        }
+        self._write_manifest()
+        return name
+
+    def finish(self, error=None):
+        self.complete = error is None
+        self.failed = error
+        self._write_manifest()
+
+    def playable_through(self):
+        """Number of leading segments that are ready, i.e. can be played without a gap"""
+        count = 0
+        while count in self.segments:
+            count += 1
+        return count
+
+    def _write_manifest(self):
+        manifest = {
+            'parts': self.parts_count,
+            'sample_rate': SAMPLE_RATE,
+            'complete': self.complete,
+            'failed': self.failed,
+            'playable_through': self.playable_through(),
+            'segments': [self.segments[i] for i in sorted(self.segments)],
+        }
+        path = os.path.join(self.directory, SEGMENT_MANIFEST)
+        # Replace atomically so readers never see a half-written manifest
+        with open(path + '.tmp', 'w') as f:
+            json.dump(manifest, f)
+        os.replace(path + '.tmp', path)
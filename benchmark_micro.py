@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+
+"""
+Microbenchmarks for the pipelines' CPU hot paths, at realistic and scaled-up
+input sizes, compared against a stored baseline
+
+Each benchmark is timed at every input size, and the exponent of its scaling
+curve (time ~ size^k) is reported along with the times. Times are also
+divided by a fixed calibration workload, so a baseline recorded on one
+machine can be compared on another.
+
+Usage:
+    python benchmark_micro.py                  # run and compare with benchmark_baseline.json
+    python benchmark_micro.py --quick          # smallest sizes only
+    python benchmark_micro.py --save-baseline  # record a new baseline
+    python benchmark_micro.py --only mmr_filter --only pcm_assembly
+"""
+
+import argparse
+import base64
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(PROJECT_DIR, 'benchmark_baseline.json')
+
+# Slowdown (relative to calibration) beyond which a result counts as a regression
+DEFAULT_TOLERANCE = 0.25
+# Sub-millisecond timings swing more with caches and clock speed, so they get more room
+SHORT_TIME = 0.001
+SHORT_TIME_TOLERANCE = 0.5
+DEFAULT_REPEAT = 9
+
+EMBEDDING_DIM = 768
+WORDS_PER_MINUTE = 145
+PCM_BYTES_PER_MINUTE = 24000 * 2 * 60
+
+
+def measure(run, repeat, min_time=0.2):
+    """
+    Median time of `repeat` rounds, each looping run() until it takes at least
+    min_time. The median rather than the best, so one lucky or unlucky round
+    on a busy machine doesn't move the result.
+    """
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            run()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1000:
+            break
+        loops *= 2 if elapsed * 10 < min_time else 1 + math.ceil(min_time / max(elapsed, 1e-9))
+    rounds = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            run()
+        rounds.append((time.perf_counter() - start) / loops)
+    return float(np.median(rounds))
+
+
+def calibrate(repeat):
+    """Time a fixed mix of pure-Python and numpy work, used as this machine's unit of speed"""
+    rng = np.random.RandomState(0)
+    matrix = rng.rand(300, 300)
+    words = [f"word{i % 997}" for i in range(200000)]
+
+    def run():
+        matrix @ matrix
+        sorted(set(words))
+        ' '.join(words).split()
+
+    return measure(run, repeat)
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks: each setup(size) returns the function to time
+
+def setup_mmr_filter(candidates):
+    from mmr import mmr_filter
+
+    rng = np.random.RandomState(candidates)
+    embeddings = rng.rand(candidates, EMBEDDING_DIM).astype(np.float32)
+    query = rng.rand(EMBEDDING_DIM).astype(np.float32)
+    return lambda: mmr_filter(embeddings, query, 15, 0.3)
+
+
+def _fake_script(minutes, seed=0):
+    rng = random.Random(seed)
+    lines, words, speaker = [], 0, 'Sarah'
+    while words < minutes * WORDS_PER_MINUTE:
+        count = rng.randint(10, 80)
+        lines.append(f"{speaker}: " + ' '.join(f"word{rng.randrange(5000)}" for _ in range(count)))
+        words += count
+        speaker = 'John' if speaker == 'Sarah' else 'Sarah'
+    return '\n'.join(lines)
+
+
+def setup_split_script(minutes):
+    from generateBroadcast import plan_script_parts
+
+    script = _fake_script(minutes)
+    return lambda: plan_script_parts(script, minutes)
+
+
+def _fake_articles(count):
+    rng = random.Random(count)
+    return [
+        {
+            'url': f"https://publisher{i % 50}.example.com/news/{i}",
+            'title': f"Headline number {i}",
+            'description': 'Description ' * 10,
+            'published date': 'Thu, 10 Jul 2025 18:06:53 GMT',
+            'publisher': f"Publisher {i % 50}",
+            'text': ' '.join(f"word{rng.randrange(5000)}" for _ in range(600)),
+            'topic': f"topic {i % 20}",
+        }
+        for i in range(count)
+    ]
+
+
+def _lookup_urls(articles):
+    return [article['url'] for article in random.Random(1).sample(articles, min(10, len(articles)))]
+
+
+def setup_article_lookup_store(articles_count):
+    from article_store import ArticleStore
+
+    directory = tempfile.mkdtemp(prefix='briefly-micro-')
+    _cleanup.append(directory)
+    store = ArticleStore(os.path.join(directory, 'articles.sqlite'))
+    articles = _fake_articles(articles_count)
+    store.save_articles(articles)
+    urls = _lookup_urls(articles)
+    return lambda: store.get_articles(urls)
+
+
+def setup_article_lookup_csv(articles_count):
+    """The articles.csv load and URL filter generate_broadcast did before the article store"""
+    import pandas as pd
+
+    directory = tempfile.mkdtemp(prefix='briefly-micro-')
+    _cleanup.append(directory)
+    path = os.path.join(directory, 'articles.csv')
+    articles = _fake_articles(articles_count)
+    pd.DataFrame(articles).to_csv(path, index=False)
+    urls = _lookup_urls(articles)
+
+    def run():
+        df = pd.read_csv(path)
+        return df[df['url'].isin(urls)]
+
+    return run
+
+
+def setup_pcm_assembly(minutes):
+    """synthesize_parts and the join generate_broadcast does, with TTS answered instantly"""
+    import types
+
+    try:
+        import google.genai  # noqa: F401
+    except ImportError:
+        # tts_config() needs google.genai's config types; the offline stand-ins will do
+        import fake_backends
+        fake_backends.install()
+    from generateBroadcast import TTS_PROMPT, plan_script_parts, synthesize_parts
+
+    parts = [part for part, _ in plan_script_parts(_fake_script(minutes), minutes)]
+    words = sum(len(part.split()) for part in parts)
+    # One base64 TTS response per part, sized by its share of the script, as the API returns them
+    responses = {}
+    for part in parts:
+        pcm = bytes(PCM_BYTES_PER_MINUTE * minutes * len(part.split()) // words // 2 * 2)
+        inline = types.SimpleNamespace(inline_data=types.SimpleNamespace(data=base64.b64encode(pcm)))
+        responses[TTS_PROMPT + part] = types.SimpleNamespace(
+            candidates=[types.SimpleNamespace(content=types.SimpleNamespace(parts=[inline]))])
+
+    class InstantTTS:
+        def generate_content_with_retry(self, model, contents, config=None):
+            return responses[contents]
+
+    def run():
+        import contextlib
+        import io
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            return b''.join(synthesize_parts(InstantTTS(), parts))
+
+    return run
+
+
+def setup_combine_topic_results(topics):
+    import pandas as pd
+    from find_articles import combine_topic_results
+
+    rng = np.random.RandomState(topics)
+    results = {
+        f"topic {t}": pd.DataFrame({
+            'title': [f"Headline {t}-{i}" for i in range(5)],
+            'url': [f"https://example.com/{t}/{i}" for i in range(5)],
+            'text': ['text ' * 500] * 5,
+            'Embedding': list(rng.rand(5, EMBEDDING_DIM).astype(np.float32)),
+        })
+        for t in range(topics)
+    }
+
+    def run():
+        import contextlib
+        import io
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            return combine_topic_results(list(results), {topic: df.copy() for topic, df in results.items()})
+
+    return run
+
+
+def setup_near_duplicates(candidates):
+    from near_duplicates import canonical_indices
+
+    documents = [article['title'] + '\n' + article['text'] for article in _fake_articles(candidates)]
+    return lambda: canonical_indices(documents)
+
+
+# name -> (setup, unit, sizes, quick sizes)
+BENCHMARKS = {
+    'mmr_filter': (setup_mmr_filter, 'candidates', [100, 1000, 10000], [100, 1000]),
+    'split_script': (setup_split_script, 'minutes', [5, 15, 30, 60], [5, 15]),
+    'article_lookup.store': (setup_article_lookup_store, 'articles', [100, 1000, 10000], [100, 1000]),
+    'article_lookup.csv': (setup_article_lookup_csv, 'articles', [100, 1000, 10000], [100, 1000]),
+    'pcm_assembly': (setup_pcm_assembly, 'minutes', [5, 15, 30, 60], [5, 15]),
+    'combine_topic_results': (setup_combine_topic_results, 'topics', [5, 20, 100], [5, 20]),
+    'near_duplicates': (setup_near_duplicates, 'candidates', [100, 1000, 3000], [100, 1000]),
+}
+
+_cleanup = []
+
+
+def scaling_exponent(points):
+    """Least-squares slope of log(time) against log(size): 1 is linear, 2 quadratic"""
+    if len(points) < 2:
+        return None
+    xs = np.log([size for size, _ in points])
+    ys = np.log([seconds for _, seconds in points])
+    return float(np.polyfit(xs, ys, 1)[0])
+
+
+def compare(results, baseline, tolerance, short_tolerance=SHORT_TIME_TOLERANCE):
+    """
+    Return (name, size, ratio) for every result slower than the baseline by
+    more than `tolerance`, or `short_tolerance` where the baseline took under
+    SHORT_TIME
+    """
+    regressions = []
+    for name, result in results['benchmarks'].items():
+        previous = baseline.get('benchmarks', {}).get(name)
+        if not previous:
+            continue
+        previous_points = {str(size): relative for size, relative in previous['relative']}
+        previous_seconds = {str(size): seconds for size, seconds in previous['seconds']}
+        for size, relative in result['relative']:
+            before = previous_points.get(str(size))
+            if not before:
+                continue
+            allowed = tolerance
+            if previous_seconds.get(str(size), SHORT_TIME) < SHORT_TIME:
+                allowed = max(tolerance, short_tolerance)
+            if relative > before * (1 + allowed):
+                regressions.append((name, size, relative / before))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmark the pipelines' CPU hot paths")
+    parser.add_argument('--only', action='append', choices=list(BENCHMARKS), help='Run only these benchmarks (repeatable)')
+    parser.add_argument('--quick', action='store_true', help='Run only the smaller input sizes')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help=f'Timing rounds per size; the median is kept (default: {DEFAULT_REPEAT})')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Baseline file (default: benchmark_baseline.json)')
+    parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline instead of comparing')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help=f'Allowed slowdown before a result is a regression (default: {DEFAULT_TOLERANCE})')
+    parser.add_argument('--short-tolerance', type=float, default=SHORT_TIME_TOLERANCE, help=f'Allowed slowdown for results that took under {SHORT_TIME * 1000:g} ms in the baseline (default: {SHORT_TIME_TOLERANCE})')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON to PATH')
+    args = parser.parse_args(argv)
+
+    if PROJECT_DIR not in sys.path:
+        sys.path.insert(0, PROJECT_DIR)
+
+    unit = calibrate(args.repeat)
+    print(f"Calibration workload: {unit * 1000:.1f} ms (times below are also shown relative to it)\n")
+    results = {'calibration': unit, 'benchmarks': {}}
+
+    try:
+        for name in args.only or BENCHMARKS:
+            setup, size_unit, sizes, quick_sizes = BENCHMARKS[name]
+            points = []
+            for size in quick_sizes if args.quick else sizes:
+                seconds = measure(setup(size), args.repeat)
+                points.append((size, seconds))
+                print(f"{name:<24}{size:>7} {size_unit:<11}{seconds * 1000:>11.3f} ms{seconds / unit:>10.3f}x")
+            exponent = scaling_exponent(points)
+            if exponent is not None:
+                print(f"{'':<24}scaling ~ {size_unit}^{exponent:.2f}")
+            results['benchmarks'][name] = {
+                'unit': size_unit,
+                'seconds': points,
+                'relative': [(size, seconds / unit) for size, seconds in points],
+                'scaling_exponent': exponent,
+            }
+    finally:
+        for directory in _cleanup:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {os.path.basename(args.baseline)}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("\nNo baseline to compare with (record one with --save-baseline)")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance, args.short_tolerance)
+    if not regressions:
+        print(f"\n✅ No regressions against {os.path.basename(args.baseline)} "
+              f"(tolerance {args.tolerance:.0%}, {max(args.tolerance, args.short_tolerance):.0%} under {SHORT_TIME * 1000:g} ms)")
+        return 0
+    print(f"\n❌ {len(regressions)} regression(s) against {os.path.basename(args.baseline)}:")
+    for name, size, ratio in regressions:
+        print(f"  {name} at {size}: {ratio:.2f}x slower")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
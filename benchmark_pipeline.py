@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+
+"""
+End-to-end pipeline benchmark against offline stand-in backends
+
+Starts local publisher sites, points api_server's pipeline workers at the
+fake GNews and Gemini backends (see fake_backends), then drives the job API
+with concurrent clients. Each request fetches articles for a few topics and
+generates a broadcast from them, and the per-stage and overall latencies are
+reported as p50/p95/p99.
+
+Everything is written to a temporary data directory (store, caches and
+artifacts), so the project's own articles and caches are left alone.
+
+Usage:
+    python benchmark_pipeline.py --clients 4 --requests 16
+    python benchmark_pipeline.py --latency '{"tts": 1.0}' --error-rate 0.05 --json results.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import fake_backends
+
+TOPICS = ['technology', 'sports', 'business', 'science', 'health', 'politics', 'entertainment', 'world news']
+
+# Stages that are reported as events but don't mark the start of a new phase
+NON_STAGES = {'segment_ready', 'topic_done'}
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of `values` (p in 0-100)"""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+
+class ApiClient:
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def request(self, path, payload=None):
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(req, timeout=120) as response:
+            return json.loads(response.read())
+
+    def wait_for_job(self, job_id):
+        """Follow a job's events with long-polls; return (events, final status)"""
+        events = []
+        after = -1
+        while True:
+            reply = self.request(f"/api/jobs/{job_id}/events?after={after}&wait=15")
+            events.extend(reply['events'])
+            if reply['events']:
+                after = reply['events'][-1]['id']
+            if reply['finished']:
+                return events, self.request(f"/api/jobs/{job_id}")
+
+
+def stage_durations(events, prefix):
+    """Seconds spent in each stage, from the job's event timestamps"""
+    durations = defaultdict(float)
+    current, started = 'queued', events[0]['time']
+    for event in events[1:]:
+        stage = event['data'].get('stage')
+        if stage is None or stage in NON_STAGES or stage == current:
+            continue
+        durations[f"{prefix}.{current}"] += event['time'] - started
+        current, started = stage, event['time']
+    durations[f"{prefix}.total"] = events[-1]['time'] - events[0]['time']
+    return durations
+
+
+def run_request(client, topics, duration):
+    """One user session: fetch articles for `topics`, then generate a broadcast from them"""
+    timings = {}
+    started = time.monotonic()
+
+    job = client.request('/api/jobs/fetch-articles', {'topics': topics, 'api_key': 'fake'})
+    events, status = client.wait_for_job(job['job_id'])
+    timings.update(stage_durations(events, 'fetch'))
+    if status['status'] != 'succeeded':
+        raise RuntimeError(f"fetch-articles failed: {status.get('error')}")
+
+    urls = []
+    for topic in topics:
+        reply = client.request('/api/articles?' + urllib.parse.urlencode({'topic': topic, 'limit': 5}))
+        urls.extend(article['url'] for article in reply['articles'])
+    if not urls:
+        raise RuntimeError("fetch-articles found no articles")
+
+    job = client.request('/api/jobs/generate-broadcast', {'urls': urls, 'api_key': 'fake', 'duration': duration, 'progressive': True})
+    events, status = client.wait_for_job(job['job_id'])
+    timings.update(stage_durations(events, 'broadcast'))
+    if status['status'] != 'succeeded':
+        raise RuntimeError(f"generate-broadcast failed: {status.get('error')}")
+    segments = [event for event in events if event['data'].get('stage') == 'segment_ready']
+    if segments:
+        timings['broadcast.first_segment'] = segments[0]['time'] - events[0]['time']
+
+    timings['request.total'] = time.monotonic() - started
+    return timings
+
+
+def start_server(port):
+    """Run api_server in this process on a threaded WSGI server"""
+    from werkzeug.serving import make_server
+
+    import api_server
+
+    # One access log line per long-poll would drown out the pipeline output
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', port, api_server.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def report(samples, failures, wall_time, requests):
+    metrics = defaultdict(list)
+    for timings in samples:
+        for name, seconds in timings.items():
+            metrics[name].append(seconds)
+
+    def order(name):
+        # Pipeline order: fetch, then broadcast, each by first appearance; totals last
+        return (name.split('.')[0] != 'fetch', name.split('.')[0] == 'request', name.endswith('.total'))
+
+    print(f"\n{'metric':<32}{'n':>5}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for name in sorted(metrics, key=order):
+        values = metrics[name]
+        print(f"{name:<32}{len(values):>5}" + ''.join(f"{percentile(values, p):>9.2f}s" for p in (50, 95, 99)) + f"{max(values):>9.2f}s")
+    print(f"\n{len(samples)}/{requests} requests succeeded, {len(failures)} failed, "
+          f"{wall_time:.1f}s wall time, {len(samples) / wall_time * 60:.1f} requests/min")
+    for failure in failures[:5]:
+        print(f"  ❌ {failure}")
+
+    return {
+        name: {'n': len(values), 'p50': percentile(values, 50), 'p95': percentile(values, 95),
+               'p99': percentile(values, 99), 'max': max(values)}
+        for name, values in metrics.items()
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the article and broadcast pipelines end to end against fake backends')
+    parser.add_argument('--clients', type=int, default=4, help='Concurrent clients (default: 4)')
+    parser.add_argument('--requests', type=int, default=8, help='Measured requests in total (default: 8)')
+    parser.add_argument('--warmup', type=int, default=1, help='Unmeasured requests run first to start the workers (default: 1)')
+    parser.add_argument('--topics-per-request', type=int, default=2, help='Topics fetched per request (default: 2)')
+    parser.add_argument('--duration', type=int, default=5, help='Broadcast minutes (default: 5)')
+    parser.add_argument('--pipeline-workers', type=int, default=2, help='Pipeline worker processes (default: 2)')
+    parser.add_argument('--publishers', type=int, default=4, help='Fake publisher sites (default: 4)')
+    parser.add_argument('--results-per-topic', type=int, default=fake_backends.DEFAULT_RESULTS, help=f'Fake GNews results per topic (default: {fake_backends.DEFAULT_RESULTS})')
+    parser.add_argument('--latency', default='{}', help=f'JSON of mean seconds per fake call, overriding {json.dumps(fake_backends.DEFAULT_LATENCY)}')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of fake Gemini calls failing with 429/503 (default: 0)')
+    parser.add_argument('--port', type=int, default=0, help='API server port (default: any free port)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for picking topics (default: 0)')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON to PATH')
+    parser.add_argument('--keep-data', action='store_true', help="Don't delete the temporary data directory")
+    args = parser.parse_args(argv)
+
+    data_dir = tempfile.mkdtemp(prefix='briefly-bench-')
+    publishers = fake_backends.ArticleServers(args.publishers)
+
+    # Must be set before api_server and the worker pool are started
+    os.environ.update({
+        'BRIEFLY_CACHE_DIR': os.path.join(data_dir, 'cache'),
+        'BRIEFLY_STORE_PATH': os.path.join(data_dir, 'articles.sqlite'),
+        'BRIEFLY_ARTIFACTS_DIR': os.path.join(data_dir, 'artifacts'),
+        'BRIEFLY_PIPELINE_WORKERS': str(args.pipeline_workers),
+        'BRIEFLY_WORKER_PRELOAD': 'fake_backends',
+        fake_backends.ENV_HOSTS: ','.join(publishers.base_urls),
+        fake_backends.ENV_LATENCY: json.dumps(json.loads(args.latency)),
+        fake_backends.ENV_ERROR_RATE: str(args.error_rate),
+        fake_backends.ENV_RESULTS: str(args.results_per_topic),
+    })
+
+    server, base_url = start_server(args.port)
+    client = ApiClient(base_url)
+    rng = random.Random(args.seed)
+    workloads = [rng.sample(TOPICS, min(args.topics_per_request, len(TOPICS))) for _ in range(args.warmup + args.requests)]
+    print(f"Benchmarking {base_url}: {args.requests} requests from {args.clients} clients, data in {data_dir}")
+
+    samples, failures = [], []
+    lock = threading.Lock()
+
+    def run(topics):
+        try:
+            timings = run_request(client, topics, args.duration)
+        except Exception as e:
+            with lock:
+                failures.append(f"{', '.join(topics)}: {e}")
+            return
+        with lock:
+            samples.append(timings)
+        print(f"  ✅ {', '.join(topics)}: {timings['request.total']:.1f}s", flush=True)
+
+    try:
+        import pipeline_workers
+
+        if args.warmup:
+            print("Warming up...")
+            with ThreadPoolExecutor(max_workers=args.pipeline_workers) as executor:
+                list(executor.map(lambda topics: run_request(client, topics, args.duration), workloads[:args.warmup]))
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=args.clients) as executor:
+            list(executor.map(run, workloads[args.warmup:]))
+        wall_time = time.monotonic() - started
+
+        results = report(samples, failures, wall_time, args.requests)
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump({'settings': vars(args), 'wall_time': wall_time, 'failures': failures, 'metrics': results}, f, indent=2)
+            print(f"Results written to {args.json}")
+    finally:
+        server.shutdown()
+        pipeline_workers.shutdown()
+        publishers.close()
+        if not args.keep_data:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+On-disk embedding cache: float32 vectors in a memory-mapped file, indexed by
+(model, task_type, text hash) in SQLite
+"""
+
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+from article_cache import DEFAULT_CACHE_DIR
+from storage import connect
+
+
+def embedding_key(model, task_type, text):
+    text_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    return f"{model}:{task_type}:{text_hash}"
+
+
+class EmbeddingCache:
+    def __init__(self, directory=None):
+        """
+        Open (or create) the embedding cache
+
+        Args:
+            directory: Directory holding embeddings.f32 and embeddings.sqlite
+        """
+        self.directory = directory or DEFAULT_CACHE_DIR
+        os.makedirs(self.directory, exist_ok=True)
+        self.vectors_path = os.path.join(self.directory, 'embeddings.f32')
+        open(self.vectors_path, 'ab').close()
+
+        self._lock = threading.Lock()
+        self._conn = connect(os.path.join(self.directory, 'embeddings.sqlite'))
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                   key TEXT PRIMARY KEY,
+                   offset INTEGER NOT NULL,
+                   dim INTEGER NOT NULL
+               )"""
+        )
+        self._conn.commit()
+        self._vectors = None
+
+    def _mapped(self, needed):
+        """Return a memmap of the vector file covering at least `needed` floats"""
+        if self._vectors is None or len(self._vectors) < needed:
+            size = os.path.getsize(self.vectors_path) // 4
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(size,)) if size else None
+        return self._vectors
+
+    def get_many(self, model, task_type, texts):
+        """Return a list with a float32 vector for each cached text and None for each miss"""
+        keys = [embedding_key(model, task_type, text) for text in texts]
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                for key, offset, dim in self._conn.execute(
+                    f"SELECT key, offset, dim FROM embeddings WHERE key IN ({placeholders})", chunk
+                ):
+                    found[key] = (offset, dim)
+            if not found:
+                return [None] * len(keys)
+            vectors = self._mapped(max(offset + dim for offset, dim in found.values()))
+
+        results = []
+        for key in keys:
+            if key in found:
+                offset, dim = found[key]
+                results.append(np.array(vectors[offset:offset + dim]))
+            else:
+                results.append(None)
+        return results
+
+    def put_many(self, model, task_type, texts, vectors):
+        """Append embeddings for `texts` to the vector file and index them"""
+        if not texts:
+            return
+        rows = [np.asarray(vector, dtype=np.float32).ravel() for vector in vectors]
+        with self._lock:
+            # BEGIN IMMEDIATE takes SQLite's write lock, so appends from other
+            # processes sharing the cache can't interleave with ours
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                offset = os.path.getsize(self.vectors_path) // 4
+                entries = []
+                with open(self.vectors_path, 'ab') as f:
+                    for text, row in zip(texts, rows):
+                        f.write(row.tobytes())
+                        entries.append((embedding_key(model, task_type, text), offset, len(row)))
+                        offset += len(row)
+                self._conn.executemany("INSERT OR REPLACE INTO embeddings (key, offset, dim) VALUES (?, ?, ?)", entries)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,356 @@
+"""
+Offline stand-ins for the pipeline's external services, for benchmarking
+on a laptop without GNews, publisher sites or Gemini:
+
+- ArticleServers: local HTTP "publisher sites" serving article pages built
+  from the paragraphs in articles.csv
+- a fake `gnews` module whose GNews.get_news returns Google-News-style
+  links to those pages (with some syndicated copies mixed in)
+- a fake `googlenewsdecoder` that decodes those links
+- a fake `google.genai` with embed, generate and TTS calls that sleep for a
+  configurable latency and fail at a configurable rate
+
+install() swaps the fake modules into sys.modules. api_server's pipeline
+workers run it when BRIEFLY_WORKER_PRELOAD=fake_backends is set; the fakes
+read their settings from the BRIEFLY_FAKE_* environment variables below.
+"""
+
+import ast
+import asyncio
+import base64
+import csv
+import html
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import types
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_CSV = os.path.join(PROJECT_DIR, 'articles.csv')
+
+# Settings, shared with the worker processes through the environment
+ENV_HOSTS = 'BRIEFLY_FAKE_ARTICLE_HOSTS'   # comma-separated base URLs of the ArticleServers
+ENV_LATENCY = 'BRIEFLY_FAKE_LATENCY'       # JSON {kind: seconds}, see DEFAULT_LATENCY
+ENV_ERROR_RATE = 'BRIEFLY_FAKE_ERROR_RATE'  # fraction of GenAI calls that fail with 429/503
+ENV_RESULTS = 'BRIEFLY_FAKE_RESULTS'       # GNews results per topic
+
+# Mean seconds per call; each call sleeps a random 0.5x-1.5x of it
+DEFAULT_LATENCY = {
+    'article': 0.2,   # one article page download
+    'decode': 0.05,   # one Google News link decode
+    'embed': 0.3,     # one embedding batch
+    'generate': 1.5,  # one text generation (headline filter or script)
+    'tts': 4.0,       # one TTS part
+}
+DEFAULT_RESULTS = 40
+
+# Every SYNDICATION_EVERY-th search result re-publishes an earlier story under another publisher
+SYNDICATION_EVERY = 8
+
+EMBEDDING_DIM = 768
+SAMPLE_RATE = 24000
+WORDS_PER_SECOND = 145 / 60
+
+
+def latency(kind):
+    settings = dict(DEFAULT_LATENCY)
+    settings.update(json.loads(os.environ.get(ENV_LATENCY) or '{}'))
+    return settings.get(kind, 0) * random.uniform(0.5, 1.5)
+
+
+def error_rate():
+    return float(os.environ.get(ENV_ERROR_RATE) or 0)
+
+
+# ---------------------------------------------------------------------------
+# Fixture articles
+
+_fixtures = None
+_fixtures_lock = threading.Lock()
+
+
+def fixtures(csv_path=FIXTURES_CSV):
+    """Title, publisher and paragraphs of each article in articles.csv"""
+    global _fixtures
+    with _fixtures_lock:
+        if _fixtures is None:
+            csv.field_size_limit(sys.maxsize)
+            _fixtures = []
+            with open(csv_path, newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    try:
+                        publisher = ast.literal_eval(row.get('publisher') or '')['title']
+                    except (ValueError, SyntaxError, KeyError, TypeError):
+                        publisher = 'Briefly Wire'
+                    paragraphs = [p.strip() for p in re.split(r'\n\s*\n', row.get('text') or '') if len(p.split()) > 5]
+                    if paragraphs:
+                        _fixtures.append({
+                            'title': (row.get('title') or '').rsplit(' - ', 1)[0],
+                            'publisher': publisher,
+                            'published date': row.get('published date'),
+                            'paragraphs': paragraphs,
+                        })
+        return _fixtures
+
+
+def topic_seed(topic):
+    return zlib.crc32(topic.lower().encode('utf-8'))
+
+
+def story(seed, n):
+    """
+    Deterministic synthetic article `n` for the topic with `seed`: a fixture
+    headline and a mix of fixture paragraphs. Every SYNDICATION_EVERY-th story
+    repeats an earlier one (a syndicated copy) under a different publisher.
+    """
+    items = fixtures()
+    original = n
+    if n and n % SYNDICATION_EVERY == 0:
+        original = n - SYNDICATION_EVERY // 2
+    rng = random.Random(seed * 100003 + original)
+    base = items[rng.randrange(len(items))]
+    pool = [paragraph for item in items for paragraph in item['paragraphs']]
+    paragraphs = base['paragraphs'][:1] + rng.sample(pool, min(len(pool), rng.randint(4, 12)))
+    publisher = items[(seed + n) % len(items)]['publisher']
+    return {
+        'title': f"{base['title']} ({original})",
+        'publisher': publisher,
+        'published date': base['published date'],
+        'paragraphs': paragraphs,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Publisher sites
+
+class _ArticleHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        match = re.match(r'^/(\d+)/(\d+)\.html$', self.path.split('?')[0])
+        if not match:
+            self.send_error(404)
+            return
+        time.sleep(latency('article'))
+        article = story(int(match.group(1)), int(match.group(2)))
+        title = html.escape(article['title'])
+        body = ''.join(f"<p>{html.escape(paragraph)}</p>\n" for paragraph in article['paragraphs'])
+        page = (
+            f"<html><head><title>{title} - {html.escape(article['publisher'])}</title>"
+            f"<meta property=\"og:title\" content=\"{title}\"></head>"
+            f"<body><article><h1>{title}</h1>\n{body}</article></body></html>"
+        ).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(page)))
+        self.end_headers()
+        self.wfile.write(page)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ArticleServers:
+    def __init__(self, count=4, host='127.0.0.1'):
+        """
+        Start `count` local publisher sites, one per port, so per-host
+        download limits behave as they would across real publishers
+        """
+        self.servers = [ThreadingHTTPServer((host, 0), _ArticleHandler) for _ in range(count)]
+        for server in self.servers:
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.base_urls = [f"http://{host}:{server.server_address[1]}" for server in self.servers]
+
+    def close(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+
+# ---------------------------------------------------------------------------
+# gnews / googlenewsdecoder
+
+def _encode_link(url):
+    return 'https://news.google.com/rss/articles/' + base64.urlsafe_b64encode(url.encode('utf-8')).decode('ascii')
+
+
+class GNews:
+    def __init__(self, language='en', country='US', period=None, max_results=None, **kwargs):
+        self.max_results = max_results or int(os.environ.get(ENV_RESULTS) or DEFAULT_RESULTS)
+
+    def get_news(self, topic):
+        hosts = [host for host in os.environ.get(ENV_HOSTS, '').split(',') if host]
+        if not hosts:
+            raise RuntimeError(f"{ENV_HOSTS} is not set; start ArticleServers first")
+        time.sleep(latency('generate') / 3)
+        seed = topic_seed(topic)
+        results = []
+        for n in range(self.max_results):
+            article = story(seed, n)
+            url = f"{hosts[n % len(hosts)]}/{seed}/{n}.html"
+            results.append({
+                'title': f"{article['title']} - {article['publisher']}",
+                'description': article['paragraphs'][0][:200],
+                'published date': article['published date'],
+                'url': _encode_link(url),
+                'publisher': {'href': hosts[n % len(hosts)], 'title': article['publisher']},
+            })
+        return results
+
+
+def gnewsdecoder(source_url, interval=None):
+    time.sleep(latency('decode'))
+    token = source_url.rsplit('/', 1)[-1]
+    try:
+        return {'status': True, 'decoded_url': base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8')}
+    except ValueError as e:
+        return {'status': False, 'message': str(e)}
+
+
+# ---------------------------------------------------------------------------
+# google.genai
+
+class APIError(Exception):
+    """Mirrors google.genai.errors.APIError: the HTTP status is in .code"""
+
+    def __init__(self, code, message, headers=None):
+        super().__init__(f"{code} {message}")
+        self.code = code
+        self.message = message
+        self.details = {'error': {'code': code, 'message': message}}
+        self.response = types.SimpleNamespace(status_code=code, headers=headers or {})
+
+
+class _Config:
+    """Stand-in for every google.genai.types config class: keeps its keyword arguments as attributes"""
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def _maybe_fail():
+    if random.random() < error_rate():
+        if random.random() < 0.5:
+            raise APIError(429, 'RESOURCE_EXHAUSTED: fake quota exceeded', {'retry-after': '1'})
+        raise APIError(503, 'UNAVAILABLE: fake backend overloaded')
+
+
+def _embedding(text):
+    rng = random.Random(zlib.crc32(text.encode('utf-8')))
+    return [rng.gauss(0, 1) for _ in range(EMBEDDING_DIM)]
+
+
+def _headline_filter(contents):
+    count = len(re.findall(r'^Headline:', contents, re.MULTILINE))
+    picks = random.sample(range(1, count + 1), min(5, count))
+    return '\n'.join(str(pick) for pick in picks)
+
+
+def _broadcast_script(contents):
+    match = re.search(r'around-(\d+) word', contents)
+    words_wanted = int(match.group(1)) if match else 500
+    vocabulary = re.findall(r'[A-Za-z]+', ' '.join(re.findall(r'^Headline: (.*)$', contents, re.MULTILINE))) or ['news']
+    lines = []
+    words = 0
+    speaker = 'Sarah'
+    while words < words_wanted:
+        count = random.randint(15, 60)
+        lines.append(f"{speaker}: " + ' '.join(random.choice(vocabulary) for _ in range(count)) + '.')
+        words += count
+        speaker = 'John' if speaker == 'Sarah' else 'Sarah'
+    return '\n'.join(lines)
+
+
+def _speech(contents):
+    seconds = len(contents.split()) / WORDS_PER_SECOND
+    pcm = bytes(int(seconds * SAMPLE_RATE) * 2)
+    part = types.SimpleNamespace(inline_data=types.SimpleNamespace(data=base64.b64encode(pcm), mime_type='audio/L16;rate=24000'))
+    return types.SimpleNamespace(text=None, candidates=[types.SimpleNamespace(content=types.SimpleNamespace(parts=[part]))])
+
+
+def _generate(contents, config):
+    if getattr(config, 'response_modalities', None) == ['AUDIO']:
+        return 'tts', lambda: _speech(contents)
+    if 'ONLY output the line numbers' in contents:
+        return 'generate', lambda: types.SimpleNamespace(text=_headline_filter(contents))
+    return 'generate', lambda: types.SimpleNamespace(text=_broadcast_script(contents))
+
+
+def _embed(contents):
+    contents = [contents] if isinstance(contents, str) else contents
+    return types.SimpleNamespace(embeddings=[types.SimpleNamespace(values=_embedding(text)) for text in contents])
+
+
+class _Models:
+    def generate_content(self, model, contents, config=None):
+        kind, respond = _generate(contents, config)
+        time.sleep(latency(kind))
+        _maybe_fail()
+        return respond()
+
+    def embed_content(self, model, contents, config=None):
+        time.sleep(latency('embed'))
+        _maybe_fail()
+        return _embed(contents)
+
+
+class _AsyncModels:
+    async def generate_content(self, model, contents, config=None):
+        kind, respond = _generate(contents, config)
+        await asyncio.sleep(latency(kind))
+        _maybe_fail()
+        return respond()
+
+    async def embed_content(self, model, contents, config=None):
+        await asyncio.sleep(latency('embed'))
+        _maybe_fail()
+        return _embed(contents)
+
+
+class Client:
+    def __init__(self, api_key=None, **kwargs):
+        self.models = _Models()
+        self.aio = types.SimpleNamespace(models=_AsyncModels())
+
+
+# ---------------------------------------------------------------------------
+
+def install():
+    """Replace gnews, googlenewsdecoder and google.genai with the fakes in this process"""
+    gnews = types.ModuleType('gnews')
+    gnews.GNews = GNews
+
+    decoder = types.ModuleType('googlenewsdecoder')
+    decoder.gnewsdecoder = gnewsdecoder
+
+    genai_types = types.ModuleType('google.genai.types')
+    genai_types.__getattr__ = lambda name: _Config
+    errors = types.ModuleType('google.genai.errors')
+    errors.APIError = APIError
+    errors.ClientError = errors.ServerError = APIError
+    genai = types.ModuleType('google.genai')
+    genai.Client = Client
+    genai.types = genai_types
+    genai.errors = errors
+
+    try:
+        import google
+    except ImportError:
+        google = types.ModuleType('google')
+        google.__path__ = []
+        sys.modules['google'] = google
+    google.genai = genai
+
+    sys.modules.update({
+        'gnews': gnews,
+        'googlenewsdecoder': decoder,
+        'google.genai': genai,
+        'google.genai.types': genai_types,
+        'google.genai.errors': errors,
+    })
+    print(f"Using fake backends in process {os.getpid()}", flush=True)
@@ -0,0 +1,665 @@
+#pip install requests beautifulsoup4 newspaper3k lxml_html_clean googlenewsdecoder gnews selenium==4.15.2 google
+# Heavy dependencies (selenium, bs4, newspaper, gnews, googlenewsdecoder,
+# google.genai) are imported inside the functions that use them, so starting
+# the script only pays for what the run actually needs. Check cold start with
+# `python startup_report.py`.
+import asyncio
+import contextlib
+import os
+import sys
+import json
+import argparse
+
+import numpy as np
+import re
+import pandas as pd
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from article_cache import ArticleCache
+from article_embeddings import save_embeddings
+from article_store import get_store
+from embedding_cache import EmbeddingCache
+from mmr import mmr_filter
+from near_duplicates import canonical_indices
+from rate_limiter import TokenBucket
+
+# Google News URL decoding: number of concurrent workers and the shared
+# request rate (requests per second) across all of them
+DECODE_WORKERS = 8
+DECODE_RATE = 4.0
+
+# Article downloads: total concurrent downloads, and the most any single
+# publisher host gets at once
+DOWNLOAD_WORKERS = 16
+DOWNLOAD_PER_HOST = 2
+
+# Extracted article text is cached on disk by decoded URL (opened by open_caches)
+ARTICLE_CACHE_TTL_HOURS = 24
+ARTICLE_CACHE_MAX_ENTRIES = 5000
+article_cache = None
+
+# Title and query embeddings are cached on disk (opened by open_caches)
+EMBEDDING_MODEL = "text-embedding-004"
+EMBED_BATCH_SIZE = 100
+USE_EMBEDDING_CACHE = True
+embedding_cache = None
+
+# Articles whose title+text MinHash similarity is at least this are treated
+# as syndicated copies of one story (see collapse_syndicated); None disables it
+DUPLICATE_THRESHOLD = 0.6
+
+ARTICLES_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'articles.csv')
+
+def set_up_selenium():
+  from selenium import webdriver
+  from selenium.webdriver.chrome.options import Options
+
+  chrome_options = Options()
+  chrome_options.add_argument("--blink-settings=imagesEnabled=false") # disable images
+  # chrome_options.experimental_options["prefs"] = {
+  #   "profile.managed_default_content_settings.javascript": 2 # disable javascript
+  # }
+  chrome_options.add_argument("--headless")  # Run Chrome in headless mode
+  chrome_options.add_argument("--no-sandbox")
+  chrome_options.add_argument("--disable-dev-shm-usage")
+  chrome_options.add_argument(f'user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36') # Set User-Agent
+
+  driver = webdriver.Chrome(options=chrome_options) # Assuming chromedriver is in PATH
+  return driver
+
+def decode_google_rss_url(url, rate_limiter=None):
+    from googlenewsdecoder import gnewsdecoder
+
+    # Pacing is done by the shared rate limiter instead of gnewsdecoder's
+    # per-call sleep, so concurrent workers don't each wait a full interval
+    if rate_limiter is not None:
+        rate_limiter.acquire()
+
+    source_url = url
+
+    try:
+        decoded_url = gnewsdecoder(source_url)
+
+        if decoded_url.get("status"):
+            #print("Decoded URL:", decoded_url["decoded_url"])
+            return decoded_url["decoded_url"]
+        else:
+            print("Error:", decoded_url["message"])
+    except Exception as e:
+        print(f"Error occurred: {e}")
+
+def decode_google_rss_urls(urls, max_workers=None, rate=None):
+    """
+    Decode a batch of Google News RSS URLs concurrently.
+
+    Args:
+        urls: List of Google News URLs.
+        max_workers: Number of decoding threads (defaults to DECODE_WORKERS).
+        rate: Maximum decode requests per second shared by all workers
+              (defaults to DECODE_RATE).
+
+    Returns:
+        A list of decoded URLs in the same order as `urls` (None where decoding failed).
+    """
+    if not urls:
+        return []
+    max_workers = max_workers or DECODE_WORKERS
+    rate_limiter = TokenBucket(rate if rate is not None else DECODE_RATE)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as executor:
+        return list(executor.map(lambda url: decode_google_rss_url(url, rate_limiter), urls))
+
+def embed_texts(client, texts, model=EMBEDDING_MODEL, task_type="SEMANTIC_SIMILARITY"):
+    """
+    Embed a list of texts, only sending cache misses to the API.
+
+    Returns:
+        A list of float32 numpy vectors in the same order as `texts`.
+    """
+    from google.genai import types
+    from robust_genai_client import get_async_robust_client, run_async
+
+    embeddings = embedding_cache.get_many(model, task_type, texts) if embedding_cache is not None else [None] * len(texts)
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    if not missing:
+        return embeddings
+
+    # Each distinct text is requested once, in batches of EMBED_BATCH_SIZE
+    # that are all sent at once through the async client
+    missing_texts = list(dict.fromkeys(texts[i] for i in missing))
+    batches = [missing_texts[start:start + EMBED_BATCH_SIZE] for start in range(0, len(missing_texts), EMBED_BATCH_SIZE)]
+    async_client = get_async_robust_client(client.api_key)
+    config = types.EmbedContentConfig(task_type=task_type)
+
+    async def embed_batches():
+        return await asyncio.gather(*(
+            async_client.embed_content_with_retry(model=model, contents=batch, config=config) for batch in batches
+        ))
+
+    new_embeddings = []
+    for result in run_async(embed_batches()):
+        new_embeddings.extend(np.asarray(embed.values, dtype=np.float32) for embed in result.embeddings)
+
+    if embedding_cache is not None:
+        embedding_cache.put_many(model, task_type, missing_texts, new_embeddings)
+    by_text = dict(zip(missing_texts, new_embeddings))
+    for i in missing:
+        embeddings[i] = by_text[texts[i]]
+    return embeddings
+
+def extract_text(driver, url):
+    from bs4 import BeautifulSoup
+
+    try:
+        driver.get(url)
+
+        # Get the page source after potential dynamic loading
+        page_source = driver.page_source
+
+        # Parse the page source with BeautifulSoup
+        soup = BeautifulSoup(page_source, 'html.parser')
+        paragraphs = soup.find_all('p')
+
+        article_text = ""
+        for p in paragraphs:
+            article_text += p.get_text(strip=True) + "\n" # Add a newline between paragraphs
+
+        return article_text.strip() # Remove leading/trailing whitespace
+
+    except Exception as e:
+        print(f"Error fetching the URL with Selenium: {e}")
+        return []
+
+
+def extract_article_text_method1(url):
+    """
+    Extract article text using newspaper3k library (recommended for articles)
+    """
+    from newspaper import Article
+
+    try:
+        article = Article(url)
+        article.download()
+        article.parse()
+
+        return {
+            'title': article.title,
+            'text': article.text,
+        }
+    except Exception as e:
+        print(f"Error with newspaper method: {e}")
+        return None
+
+def extract_article_text(driver, url, method='newspaper'):
+    """
+    Main function to extract article text with fallback methods
+    """
+    if article_cache is not None:
+        cached = article_cache.get(url)
+        if cached:
+            return cached['text']
+
+    if method == 'newspaper':
+        result = extract_article_text_method1(url)
+        if result and result['text']:
+            if article_cache is not None:
+                article_cache.put(url, result['text'], result['title'])
+            return result['text']
+        print("Newspaper method failed...")
+        #return extract_text(driver, url)
+        return None
+    else:
+        #return extract_text(driver, url)
+        return None
+
+def extract_article_texts(driver, urls, max_workers=None, per_host_limit=None):
+    """
+    Download and extract a batch of articles concurrently.
+
+    Args:
+        driver: Selenium driver passed through to extract_article_text.
+        urls: List of article URLs (None entries are skipped).
+        max_workers: Global cap on concurrent downloads (defaults to DOWNLOAD_WORKERS).
+        per_host_limit: Cap on concurrent downloads from one host (defaults to DOWNLOAD_PER_HOST).
+
+    Returns:
+        A list of article texts in the same order as `urls` (None where extraction failed).
+    """
+    if not urls:
+        return []
+    max_workers = max_workers or DOWNLOAD_WORKERS
+    per_host_limit = per_host_limit or DOWNLOAD_PER_HOST
+
+    host_locks = defaultdict(lambda: threading.BoundedSemaphore(per_host_limit))
+    host_locks_guard = threading.Lock()
+
+    def download(url, host):
+        with host_locks_guard:
+            host_lock = host_locks[host]
+        with host_lock:
+            return extract_article_text(driver, url)
+
+    # Queue the downloads round-robin across hosts so that workers rarely sit
+    # blocked on one publisher's limit while other hosts have work waiting
+    by_host = defaultdict(list)
+    for i, url in enumerate(urls):
+        if url:
+            by_host[urlparse(url).netloc.lower()].append(i)
+    order = []
+    while by_host:
+        for host in list(by_host):
+            order.append((by_host[host].pop(0), host))
+            if not by_host[host]:
+                del by_host[host]
+
+    texts = [None] * len(urls)
+    if not order:
+        return texts
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(order))) as executor:
+        futures = {executor.submit(download, urls[i], host): i for i, host in order}
+        for future, i in futures.items():
+            texts[i] = future.result()
+    return texts
+
+# Selenium is only needed by the extract_text fallback, which is currently
+# disabled, so no browser is launched unless that path is turned back on
+driver = None
+
+def search_query_for(topic):
+  predefined_topics = ['technology', 'business', 'science', 'health', 'politics', 'sports']
+
+  if topic.lower() not in predefined_topics:
+      # For custom topics, use a more flexible search approach
+      return f"{topic} news OR  {topic} latest OR {topic} update OR {topic} breaking"
+  else:
+      #use existing logic for predefined topics
+      return topic
+
+def gather_candidates(topic):
+  from gnews import GNews
+
+  google_news = GNews(language='en',
+      country='US',
+      period='3d',
+                      )
+  json_resp = google_news.get_news(topic)
+  df = pd.DataFrame(json_resp)
+  df["topic"] = topic
+  return df
+
+def select_articles(df, topic, query_embedding, client):
+  """
+  Narrow one topic's embedded candidates down with MMR and then the Gemini filter.
+  """
+  all_embeddings = df['Embedding'].tolist()
+
+  k = 15
+
+  lambda_param = 0.3
+
+  # Get the indices of the top k titles using MMR
+  mmr_selected_indices = mmr_filter(all_embeddings, query_embedding, k, lambda_param)
+
+
+  # You can then create a new DataFrame with the selected titles
+  mmr_filtered_df = df.loc[mmr_selected_indices]
+  df = mmr_filtered_df
+  df.reset_index(level=None, drop=True, inplace=True, allow_duplicates=False)
+
+  print(f"done filtering titles with MMR ({topic})")
+
+  input_string = "Given the following article/blog headlines, find the most interesting stories/news. Don't use ones that obviously aren't even close to news/blogs/stories. ONLY output the line numbers (starting from 1) of the best 5. DON'T use special characters like * unless they are in the headline." + "\n\n"
+
+  for i in range(len(mmr_filtered_df)):
+    input_string += '\nHeadline: "' + mmr_filtered_df.iloc[i]["title"] + '"'
+    input_string += "\n"
+
+  response = client.generate_content_with_retry(
+      model="gemini-2.5-flash-preview-05-20",
+      contents=input_string
+  )
+
+  good_titles = response.text.split("\n")
+  good_titles = [int(s) - 1 for s in good_titles]
+  filtered_df = df.loc[good_titles]
+  df = filtered_df
+  df.reset_index(level=None, drop=True, inplace=True, allow_duplicates=False)
+
+  print(f"done filtering titles with Gemini ({topic})")
+
+  return df
+
+def collapse_syndicated(articles, previous):
+  """
+  Collapse near-duplicate articles (the same wire story under several
+  publishers) into one canonical article, the one with the most text.
+  Articles kept by earlier groups (`previous`, url -> row) take precedence,
+  so a story already seen for another topic keeps its first URL.
+
+  Returns:
+      (articles without duplicates, dict mapping each URL to its canonical URL)
+  """
+  rows = articles.to_dict("records")
+  known = set(articles["url"])
+  rows += [row for url, row in previous.items() if url not in known]
+  if len(rows) < 2:
+    return articles, {}
+
+  # GNews titles end in " - Publisher", which differs between syndicated copies
+  documents = [str(row["title"]).rsplit(" - ", 1)[0] + "\n" + str(row["text"]) for row in rows]
+  rank = [(row["url"] in previous, len(str(row["text"]))) for row in rows]
+  canonical = canonical_indices(documents, rank, DUPLICATE_THRESHOLD)
+
+  canonical_urls = {row["url"]: rows[canonical[i]]["url"] for i, row in enumerate(rows)}
+  kept = [rows[i] for i in sorted(set(canonical[:len(articles)]))]
+  return pd.DataFrame(kept, columns=articles.columns), canonical_urls
+
+def findArticlesForTopics(topics, api_key, progress=None, on_topic=None, stream=False):
+  """
+  Find articles for several topics at once.
+
+  Candidates for every topic are collected first and deduplicated by URL, so
+  an article shared by overlapping topics is decoded, downloaded and embedded
+  only once, and all titles and search queries are embedded in batched calls.
+  Syndicated copies of the same story are collapsed into one article before
+  embedding (see collapse_syndicated), within and across topics.
+  MMR and the Gemini filter then run per topic on the shared embeddings.
+
+  With stream=True the topics are instead run through the pipeline one at a
+  time (still reusing links and articles already processed for earlier
+  topics), so the first topic's results are ready without waiting for the
+  rest. on_topic(topic, df) is called as soon as each topic's final articles
+  are selected.
+
+  If given, progress(stage, percent, message) is called as each stage starts.
+
+  Returns:
+      A dict mapping each topic to its DataFrame of selected articles
+      (None for topics that failed).
+  """
+  from robust_genai_client import get_robust_client
+
+  # Rate limited, retried and circuit-broken per model (see robust_genai_client)
+  client = get_robust_client(api_key)
+  groups = [[topic] for topic in topics] if stream else [list(topics)]
+  shared = {"decoded_urls": {}, "texts": {}, "articles": {}}
+  results = {}
+
+  for g, group in enumerate(groups):
+    def report(stage, fraction, message, g=g):
+      if progress:
+        progress(stage, int(100 * (g + fraction) / len(groups)), message)
+
+    group_results = find_articles_for_group(group, client, shared, report)
+    for topic in group:
+      results[topic] = group_results.get(topic)
+      if on_topic:
+        on_topic(topic, results[topic])
+
+  return results
+
+def find_articles_for_group(topics, client, shared, report):
+  """
+  Run the search, decode, extract, embed and select stages for one group of
+  topics. `shared` carries decoded links, extracted texts and the articles
+  kept so far between groups.
+  """
+  report("searching", 0, f"Searching {', '.join(topics)}")
+  results = {}
+  frames = []
+  for topic in topics:
+    try:
+      frames.append(gather_candidates(topic))
+    except Exception as e:
+      print(f"Error searching topic '{topic}': {str(e)}")
+      results[topic] = None
+  candidates = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+  if candidates.empty:
+    return results
+  print(f"done searching {len(topics)} topics ({len(candidates)} results)")
+  report("decoding", 0.1, f"Decoding {len(candidates)} article links")
+
+  decoded_urls = shared["decoded_urls"]
+  google_urls = [url for url in candidates["url"].drop_duplicates() if url not in decoded_urls]
+  decoded_urls.update(zip(google_urls, decode_google_rss_urls(google_urls)))
+  candidates["url"] = candidates["url"].map(decoded_urls)
+  candidates = candidates.dropna(subset=["url"])
+
+  print("done decoding urls")
+  report("extracting", 0.25, f"Downloading {candidates['url'].nunique()} articles")
+
+  # One row per unique article across all topics
+  articles = candidates.drop_duplicates(subset="url").drop(columns=["topic"]).reset_index(drop=True)
+  texts = shared["texts"]
+  new_urls = [url for url in articles["url"] if url not in texts]
+  texts.update(zip(new_urls, extract_article_texts(driver, new_urls)))
+  articles["text"] = articles["url"].map(texts)
+  articles.dropna(subset=["text"], inplace=True)
+  articles.reset_index(level=None, drop=True, inplace=True, allow_duplicates=False)
+
+  print(f"done extracting article text ({len(articles)} unique articles)")
+
+  if DUPLICATE_THRESHOLD and not articles.empty:
+    found = len(articles)
+    articles, canonical_urls = collapse_syndicated(articles, shared["articles"])
+    candidates["url"] = candidates["url"].map(lambda url: canonical_urls.get(url, url))
+    print(f"collapsed {found} articles into {len(articles)} distinct stories")
+  shared["articles"].update((row["url"], row) for row in articles.to_dict("records"))
+  report("embedding", 0.6, "Embedding headlines")
+
+  queries = [search_query_for(topic) for topic in topics]
+  embeddings = embed_texts(client, articles["title"].tolist() + queries)
+  articles["Embedding"] = embeddings[:len(articles)]
+  query_embeddings = dict(zip(topics, embeddings[len(articles):]))
+
+  print("done making title embeddings")
+
+  for i, topic in enumerate(topics):
+    if topic in results:
+      continue
+    report("selecting", 0.7 + 0.25 * i / len(topics), f"Selecting articles for {topic}")
+    try:
+      topic_urls = candidates.loc[candidates["topic"] == topic, "url"].drop_duplicates()
+      df = articles[articles["url"].isin(topic_urls)].reset_index(drop=True)
+      if df.empty:
+        results[topic] = None
+        continue
+      results[topic] = select_articles(df, topic, query_embeddings[topic], client)
+    except Exception as e:
+      print(f"Error processing topic '{topic}': {str(e)}")
+      results[topic] = None
+
+  return results
+
+def findArticles(topic, api_key):
+  return findArticlesForTopics([topic], api_key)[topic]
+
+def open_caches():
+    """Open the on-disk caches once per process, as configured by the module settings"""
+    global article_cache, embedding_cache
+    if article_cache is None and ARTICLE_CACHE_TTL_HOURS > 0:
+        article_cache = ArticleCache(ttl=ARTICLE_CACHE_TTL_HOURS * 3600, max_entries=ARTICLE_CACHE_MAX_ENTRIES)
+    if embedding_cache is None and USE_EMBEDDING_CACHE:
+        embedding_cache = EmbeddingCache()
+
+def close_caches():
+    global article_cache, embedding_cache
+    if article_cache is not None:
+        article_cache.close()
+        article_cache = None
+    if embedding_cache is not None:
+        embedding_cache.close()
+        embedding_cache = None
+
+def embeddings_prefix_for(output_path):
+    """articles.csv -> articles_embeddings(.npy/.json)"""
+    return os.path.splitext(output_path)[0] + '_embeddings'
+
+def topic_result_record(topic, df):
+    """JSON-ready summary of one topic's selected articles (without text and embeddings)"""
+    if df is None or df.empty:
+        return {'topic': topic, 'articles': []}
+    columns = [col for col in df.columns if col not in ('text', 'Embedding')]
+    return {'topic': topic, 'articles': json.loads(df[columns].to_json(orient='records'))}
+
+def combine_topic_results(topics, results):
+    """Stack each topic's articles, tagged with their topic, into one DataFrame"""
+    frames = []
+    for topic in topics:
+        df = results.get(topic)
+
+        if df is not None and not df.empty:
+            # Add topic column to identify which topic each article belongs to
+            df['topic'] = topic
+            frames.append(df)
+            print(f"Found {len(df)} articles for topic: {topic}")
+        else:
+            print(f"No articles found for topic: {topic}")
+
+    # One concat at the end: concatenating inside the loop copies every earlier topic's rows again
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+def fetch_articles(topics, api_key, output_path=ARTICLES_CSV, progress=None, stream=False, on_topic=None):
+    """
+    Run the article pipeline for `topics` and save the results to `output_path`.
+    `progress` is passed through to findArticlesForTopics.
+
+    With stream=True topics are processed one after another, and each topic's
+    articles are published as soon as they are selected: as a "topic_done"
+    progress event carrying topic_result_record() as data, and through
+    on_topic(record) if given. The CSV is still written at the end.
+
+    Returns:
+        The DataFrame of saved articles. On a fatal error an empty CSV is
+        written and the exception is re-raised.
+    """
+    open_caches()
+    try:
+        topics = topics if topics else ["Technology", "Business", "Science"]
+
+        print(f"Using topics: {topics}")
+        print("API key provided (hidden for security)")
+
+        def publish_topic(topic, df):
+            if df is not None:
+                df['topic'] = topic
+            record = topic_result_record(topic, df)
+            print(f"Topic ready: {topic} ({len(record['articles'])} articles)")
+            if progress:
+                progress("topic_done", None, f"Articles ready for {topic}", data=record)
+            if on_topic:
+                on_topic(record)
+
+        results = findArticlesForTopics(topics, api_key, progress=progress,
+                                        on_topic=publish_topic if stream else None, stream=stream)
+
+        total_df = combine_topic_results(topics, results)
+
+        # Save results to CSV
+        if progress:
+            progress("saving", 98, f"Saving {len(total_df)} articles")
+        if not total_df.empty:
+            # Ensure we have the required columns
+            required_columns = ['title', 'url', 'publisher', 'published date', 'text', 'topic']
+
+            # Add missing columns if they don't exist
+            for col in required_columns:
+                if col not in total_df.columns:
+                    total_df[col] = ''
+
+            # Embeddings go to a memory-mappable float32 matrix rather than
+            # stringified lists in the CSV
+            if 'Embedding' in total_df.columns:
+                save_embeddings(embeddings_prefix_for(output_path), total_df['url'].tolist(), total_df['Embedding'].tolist())
+                total_df = total_df.drop(columns=['Embedding'])
+
+            # Save to CSV
+            total_df.to_csv(output_path, index=False)
+            print(f"Successfully saved {len(total_df)} articles to {os.path.basename(output_path)}")
+
+            # Index them for keyed lookups by generateBroadcast and api_server
+            get_store().save_dataframe(total_df)
+
+        else:
+            print("No articles found for any topic")
+            # Create an empty CSV with the required columns
+            total_df = pd.DataFrame(columns=['title', 'url', 'publisher', 'published date', 'text', 'topic'])
+            total_df.to_csv(output_path, index=False)
+            print(f"Created empty {os.path.basename(output_path)} file")
+
+        return total_df
+
+    except Exception:
+        # Create an empty CSV in case of error
+        empty_df = pd.DataFrame(columns=['title', 'url', 'publisher', 'published date', 'text', 'topic'])
+        empty_df.to_csv(output_path, index=False)
+        raise
+
+def main(argv=None):
+    global DECODE_WORKERS, DECODE_RATE, DOWNLOAD_WORKERS, DOWNLOAD_PER_HOST
+    global ARTICLE_CACHE_TTL_HOURS, ARTICLE_CACHE_MAX_ENTRIES, USE_EMBEDDING_CACHE, DUPLICATE_THRESHOLD
+
+    # Parse command line arguments
+    parser = argparse.ArgumentParser(description='Find articles for specified topics')
+    parser.add_argument('--api-key', required=True, help='Gemini API key')
+    parser.add_argument('--decode-workers', type=int, default=DECODE_WORKERS, help=f'Concurrent Google News URL decoders (default: {DECODE_WORKERS})')
+    parser.add_argument('--decode-rate', type=float, default=DECODE_RATE, help=f'Max URL decode requests per second across all workers (default: {DECODE_RATE})')
+    parser.add_argument('--download-workers', type=int, default=DOWNLOAD_WORKERS, help=f'Concurrent article downloads (default: {DOWNLOAD_WORKERS})')
+    parser.add_argument('--download-per-host', type=int, default=DOWNLOAD_PER_HOST, help=f'Max concurrent downloads from one publisher host (default: {DOWNLOAD_PER_HOST})')
+    parser.add_argument('--article-cache-ttl', type=float, default=ARTICLE_CACHE_TTL_HOURS, help=f'Hours extracted article text stays cached (default: {ARTICLE_CACHE_TTL_HOURS}, 0 disables the cache)')
+    parser.add_argument('--article-cache-size', type=int, default=ARTICLE_CACHE_MAX_ENTRIES, help=f'Max cached articles before least recently used ones are evicted (default: {ARTICLE_CACHE_MAX_ENTRIES})')
+    parser.add_argument('--no-embedding-cache', action='store_true', help='Always request title and query embeddings from the API')
+    parser.add_argument('--duplicate-threshold', type=float, default=DUPLICATE_THRESHOLD, help=f'Similarity at which articles count as copies of one story, 0 keeps them all (default: {DUPLICATE_THRESHOLD})')
+    parser.add_argument('--stream-ndjson', metavar='PATH', help="Process topics one at a time and write each topic's articles as an NDJSON line to PATH ('-' for stdout) as soon as it is ready")
+    parser.add_argument('topics', nargs='*', help='Topics to search for')
+
+    args = parser.parse_args(argv)
+
+    # With --stream-ndjson - stdout carries the NDJSON, so the log goes to stderr
+    ndjson_to_stdout = args.stream_ndjson == '-'
+    stdout = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr) if ndjson_to_stdout else contextlib.nullcontext():
+        print("Script Started")
+
+        try:
+            DECODE_WORKERS = args.decode_workers
+            DECODE_RATE = args.decode_rate
+            DOWNLOAD_WORKERS = args.download_workers
+            DOWNLOAD_PER_HOST = args.download_per_host
+            ARTICLE_CACHE_TTL_HOURS = args.article_cache_ttl
+            ARTICLE_CACHE_MAX_ENTRIES = args.article_cache_size
+            USE_EMBEDDING_CACHE = not args.no_embedding_cache
+            DUPLICATE_THRESHOLD = args.duplicate_threshold
+
+            if args.stream_ndjson:
+                ndjson = stdout if ndjson_to_stdout else open(args.stream_ndjson, 'w')
+
+                def write_topic(record):
+                    ndjson.write(json.dumps(record) + "\n")
+                    ndjson.flush()
+
+                try:
+                    fetch_articles(args.topics, args.api_key, stream=True, on_topic=write_topic)
+                finally:
+                    if ndjson is not stdout:
+                        ndjson.close()
+            else:
+                fetch_articles(args.topics, args.api_key)
+
+        except Exception as e:
+            print(f"Fatal error: {str(e)}")
+            sys.exit(1)
+
+        finally:
+            # Clean up: close the selenium driver
+            if driver is not None:
+                driver.quit()
+                print("Selenium driver closed")
+            close_caches()
+
+
+if __name__ == "__main__":
+    main()
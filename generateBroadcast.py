@@ -1,47 +1,90 @@
-from google import genai
-from google.genai import types
-import pandas as pd
 import wave
 import sys
 import base64
-import time
 import math
-import random
+import re
 import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def split_script(script, duration=5):
-    parts = []
-    partsCount = max(1, int(math.ceil(duration / 5)))
-    script_lines = script.split("\n")
-    linesAmount = int(math.ceil(len(script_lines) / partsCount))
-    shiftLines = False
-    for i in range(partsCount):
-
-        if i == partsCount - 1:
-            # Last part gets all remaining lines
-            start = i * linesAmount
-            end = len(script_lines)
-            if (shiftLines):
-                # If the last part was shifted, we need to adjust the beginning
-                start -= 1
-                shiftLines = False
-            part = script_lines[start:end]
+from article_store import get_store
+from audio_encoding import AUDIO_FORMATS, encode_audio
+from audio_segments import SegmentPublisher
+from prompt_compaction import DEFAULT_INPUT_TOKEN_BUDGET, compact_articles, estimate_tokens
+from robust_genai_client import DEFAULT_MODEL_RATE, MODEL_RATES, get_robust_client
+from script_cache import get_script_cache, script_cache_key
+from tts_cache import get_tts_cache, tts_cache_key
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+ARTICLES_CSV = os.path.join(PROJECT_DIR, 'articles.csv')
+BROADCAST_WAV = os.path.join(PROJECT_DIR, 'Broadcast.wav')
+
+SCRIPT_MODEL = "gemini-2.5-flash-preview-05-20"
+# Bump whenever the script prompt changes so cached scripts aren't reused for it
+SCRIPT_PROMPT_VERSION = 1
+TTS_MODEL = "gemini-2.5-flash-preview-tts"
+TTS_PROMPT = "This is a news broadcast between Sarah and John:\n"
+TTS_VOICES = {'John': 'Kore', 'Sarah': 'Puck'}
+# Script parts synthesized at the same time: set BRIEFLY_TTS_WORKERS for a fixed
+# number, otherwise see tts_worker_count
+TTS_WORKERS = int(os.environ.get('BRIEFLY_TTS_WORKERS') or 0) or None
+TTS_REQUEST_SECONDS = 4  # typical time for one part's TTS request
+WORDS_PER_MINUTE = 145  # average speaking rate of the anchors
+
+def speaker_turns(script):
+    """Group script lines into speaker turns; a turn starts at each 'Name:' line"""
+    speaker_line = re.compile(r'^\s*(' + '|'.join(map(re.escape, TTS_VOICES)) + r')\s*:')
+    lines = [line for line in script.split("\n") if line.strip()]
+    if not any(speaker_line.match(line) for line in lines):
+        # No recognizable speakers: every line is its own turn
+        return lines
+    turns = []
+    for line in lines:
+        if speaker_line.match(line) or not turns:
+            turns.append(line)
         else:
-            start = i * linesAmount
-            if (shiftLines):
-                # If the last part was shifted, we need to adjust the beginning
-                start -= 1
-                shiftLines = False
-            end = (i + 1) * linesAmount
-            part = script_lines[start:end]
-        if end - 1 < len(script_lines) and "Sarah:" in script_lines[end - 1]:
-            shiftLines = True
-            end -= 1
-            part = script_lines[start:end]
-
-
-        parts.append("\n".join(part))
-    return parts
+            turns[-1] += "\n" + line
+    return turns
+
+def estimate_seconds(text):
+    """Expected speaking time of `text`, from its word count"""
+    return len(text.split()) * 60 / WORDS_PER_MINUTE
+
+def plan_script_parts(script, duration=5):
+    """
+    Split a script into about one part per 5 minutes of broadcast, cutting only
+    between complete speaker turns and balancing the parts' speaking time.
+
+    Returns:
+        A list of (part_text, expected_seconds) tuples in script order.
+    """
+    turns = speaker_turns(script)
+    if not turns:
+        return []
+    parts_count = min(len(turns), max(1, int(math.ceil(duration / 5))))
+
+    seconds = [estimate_seconds(turn) for turn in turns]
+    cumulative = [0]
+    for value in seconds:
+        cumulative.append(cumulative[-1] + value)
+    total = cumulative[-1]
+
+    # Cut at the turn boundary closest to each evenly spaced target time,
+    # leaving at least one turn for every remaining part
+    bounds = [0]
+    for j in range(1, parts_count):
+        target = total * j / parts_count
+        candidates = range(bounds[-1] + 1, len(turns) - (parts_count - j) + 1)
+        bounds.append(min(candidates, key=lambda b: abs(cumulative[b] - target)))
+    bounds.append(len(turns))
+
+    return [
+        ("\n".join(turns[start:end]), cumulative[end] - cumulative[start])
+        for start, end in zip(bounds, bounds[1:])
+    ]
+
+def split_script(script, duration=5):
+    return [part for part, _ in plan_script_parts(script, duration)]
 
 def wave_file(filename, pcm, channels=1, rate=24000, sample_width=2):
    with wave.open(filename, "wb") as wf:
@@ -50,80 +93,218 @@ def wave_file(filename, pcm, channels=1, rate=24000, sample_width=2):
       wf.setframerate(rate)
       wf.writeframes(pcm)
 
-def retry_with_backoff(func, max_retries=3, base_delay=1):
-    """Execute a function with exponential backoff retry logic"""
-    for attempt in range(max_retries + 1):
+def tts_config():
+    """Two-speaker voice configuration for the Sarah/John broadcast"""
+    from google.genai import types
+
+    return types.GenerateContentConfig(
+        response_modalities=["AUDIO"],
+        speech_config=types.SpeechConfig(
+            multi_speaker_voice_config=types.MultiSpeakerVoiceConfig(
+                speaker_voice_configs=[
+                    types.SpeakerVoiceConfig(
+                        speaker=speaker,
+                        voice_config=types.VoiceConfig(
+                            prebuilt_voice_config=types.PrebuiltVoiceConfig(
+                                voice_name=voice_name,
+                            )
+                        )
+                    )
+                    for speaker, voice_name in TTS_VOICES.items()
+                ]
+            )
+        )
+    )
+
+def decode_audio_data(data):
+    """Turn a TTS response's inline audio data into raw PCM bytes"""
+    if isinstance(data, str):
+        return base64.b64decode(data)
+    elif isinstance(data, bytes):
         try:
-            return func()
-        except Exception as e:
-            error_str = str(e).lower()
-            
-            # Check if it's a retryable error
-            retryable_conditions = ['500', '502', '503', '504', 'internal error', 'timeout']
-            is_retryable = any(condition in error_str for condition in retryable_conditions)
-            
-            if not is_retryable or attempt == max_retries:
-                raise e
-            
-            # Calculate delay with exponential backoff and jitter
-            delay = base_delay * (2 ** attempt) + random.uniform(0.1, 0.3)
-            print(f"⚠️ Attempt {attempt + 1} failed with retryable error: {str(e)}")
-            print(f"⏳ Retrying in {delay:.1f} seconds...")
-            time.sleep(delay)
-    
-    raise Exception("All retry attempts failed")
+            # Try to decode as base64 first
+            return base64.b64decode(data)
+        except:
+            # If that fails, assume it's already raw audio data
+            return data
+    return data
+
+def synthesize_part(client, part):
+    """Synthesize one script part and return its PCM audio"""
+    prompt = TTS_PROMPT + part
+    response = client.generate_content_with_retry(
+        model=TTS_MODEL,
+        contents=prompt,
+        config=tts_config()
+    )
+    return decode_audio_data(response.candidates[0].content.parts[0].inline_data.data)
+
+def tts_worker_count(part_count):
+    """
+    Parts to synthesize at once: TTS_WORKERS if set, otherwise every part, up
+    to the requests the TTS model's rate limit can keep in flight (rate times
+    request time); more threads would only wait on the limiter
+    """
+    if TTS_WORKERS:
+        return max(1, min(TTS_WORKERS, part_count))
+    rate = MODEL_RATES.get(TTS_MODEL, DEFAULT_MODEL_RATE)
+    if rate:
+        return max(1, min(part_count, math.ceil(rate * TTS_REQUEST_SECONDS)))
+    return max(1, part_count)
+
+def synthesize_parts(client, script_parts, max_workers=None, on_part=None, cache=None, expected_seconds=None):
+    """
+    Synthesize script parts concurrently.
+
+    Args:
+        client: RobustGenAIClient (retries each part on its own).
+        script_parts: List of script texts.
+        max_workers: Parts synthesized at once (defaults to tts_worker_count).
+        on_part: Optional callback on_part(index, pcm, completed_count), called
+                 as each part finishes, in completion order.
+        cache: Optional TTSCache; parts already synthesized with the same
+               text, model and voices are read from it instead.
+        expected_seconds: Optional expected length of each part; the longest
+                          parts are started first so the workers finish together.
+                          Leave it out to start the parts in script order.
+
+    Returns:
+        The PCM audio for each part, in script order.
+    """
+    if not script_parts:
+        return []
+    max_workers = max_workers or tts_worker_count(len(script_parts))
+
+    def synthesize(i, part):
+        key = tts_cache_key(part, TTS_MODEL, TTS_VOICES, TTS_PROMPT) if cache is not None else None
+        if key:
+            pcm = cache.get(key)
+            if pcm:
+                print(f"Part {i + 1}/{len(script_parts)}: reusing cached audio")
+                return pcm
+        print(f"Part {i + 1}/{len(script_parts)}: {part[:50]}...")
+        pcm = synthesize_part(client, part)
+        if key and pcm:
+            cache.put(key, pcm)
+        return pcm
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(script_parts)))
+    try:
+        order = range(len(script_parts))
+        if expected_seconds:
+            order = sorted(order, key=lambda i: -expected_seconds[i])
+        futures = {executor.submit(synthesize, i, script_parts[i]): i for i in order}
+        pcm_parts = [None] * len(script_parts)
+        for completed, future in enumerate(as_completed(futures), start=1):
+            i = futures[future]
+            pcm_parts[i] = future.result()
+            if on_part:
+                on_part(i, pcm_parts[i], completed)
+        return pcm_parts
+    finally:
+        # On failure, don't start parts that haven't begun yet
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def generate_broadcast(urls, api_key, duration=5, articles_path=ARTICLES_CSV, output_path=BROADCAST_WAV, progress=None, store_path=None, tts_workers=None, progressive=False, audio_format='wav', use_script_cache=True, use_tts_cache=True, input_token_budget=DEFAULT_INPUT_TOKEN_BUDGET):
+    """
+    Generate a broadcast script from the given article URLs and synthesize it to a WAV file.
+    If given, progress(stage, percent, message) is called as each stage starts.
+    Script parts are synthesized `tts_workers` at a time (defaults to tts_worker_count).
+
+    With progressive=True each part is also published as a playable WAV
+    segment next to `output_path` (see audio_segments) as soon as it is
+    synthesized, with a "segment_ready" progress event, so playback can start
+    before the whole broadcast is done.
+
+    With audio_format other than 'wav' the WAV is then compressed with a local
+    encoder (see audio_encoding) and replaced by the encoded file.
+
+    Scripts are cached by a hash of the articles, duration, prompt version and
+    model (see script_cache), so a repeat request skips the LLM call; pass
+    use_script_cache=False to always write a fresh script. Likewise each
+    part's audio is cached by its text, model and voices (see tts_cache)
+    unless use_tts_cache=False.
+
+    Article text is compacted before it goes into the prompt (see
+    prompt_compaction): repeated paragraphs and boilerplate are dropped and
+    the articles share `input_token_budget` tokens (None or 0 for no limit).
+
+    Returns:
+        The path of the written audio file, or None if nothing was generated.
+    """
+    from google.genai import types
 
-def generate_broadcast(urls, api_key, duration=5):
     try:
-        # Initialize the GenAI client with the provided API key
-        client = genai.Client(api_key=api_key)
-        words = 145 * duration  # Average 145 words per minute
+        # Shared, rate limited and retrying client for this API key (see robust_genai_client)
+        client = get_robust_client(api_key)
+        words = WORDS_PER_MINUTE * duration
         input_string = f"Generate an around-{words} word script between anchors Sarah and John about various topics. Base the script on the following articles, quickly going through each news and transitioning smoothly. Note that the content was retreived through web scraping, so extraneous metadata may also be there. ONLY output the verbal script, nothing else. Don't use special characters like **. First line starts with Sarah. Make sure to cite the source for each article. The articles are below:"
 
-        print("Loading articles from CSV...")
-        df = pd.read_csv("articles.csv")
-        print(f"Loaded {len(df)} total articles from CSV")
+        print("Looking up articles in the article store...")
+        if progress:
+            progress("loading", 0, "Loading articles")
+        store = get_store(store_path)
+        if store.count() == 0 and os.path.exists(articles_path):
+            # First run against an existing articles.csv: index it once
+            print(f"Article store is empty, importing {os.path.basename(articles_path)}...")
+            store.import_csv(articles_path)
 
-        print("Filtering articles based on provided URLs...")
-        original_count = len(df)
-        df = df[df['url'].isin(urls)].reset_index(drop=True)
-        print(f"Found {len(df)} matching articles out of {original_count} total articles")
+        articles = store.get_articles(urls)
+        print(f"Found {len(articles)} matching articles for {len(urls)} URLs")
         
-        if len(df) == 0:
+        if len(articles) == 0:
             print("Warning: No articles found matching the provided URLs")
             print("Provided URLs:")
             for url in urls:
                 print(f"  - {url}")
-            print("Available URLs in CSV:")
-            available_urls = pd.read_csv("articles.csv")['url'].tolist()
-            for url in available_urls[:10]:  # Show first 10
+            print("Recently stored URLs:")
+            available_urls = store.sample_urls(10)
+            for url in available_urls:
                 print(f"  - {url}")
-            if len(available_urls) > 10:
-                print(f"  ... and {len(available_urls) - 10} more")
+            remaining = store.count() - len(available_urls)
+            if remaining > 0:
+                print(f"  ... and {remaining} more")
             return
         
-        for i in range(len(df)):
-            input_string += "\nHeadline: " + df.iloc[i]["title"]
-            input_string += "\nContent: " + df.iloc[i]["text"]
+        original_tokens = sum(estimate_tokens(article["text"] or "") for article in articles)
+        articles = compact_articles(articles, input_token_budget)
+        print(f"Compacted article text from ~{original_tokens} to ~{sum(estimate_tokens(article['text']) for article in articles)} tokens")
+
+        for article in articles:
+            input_string += "\nHeadline: " + (article["title"] or "")
+            input_string += "\nContent: " + (article["text"] or "")
 
-        print("Generating script content...")
+        script_key = script_cache_key(articles, duration, SCRIPT_PROMPT_VERSION, SCRIPT_MODEL)
+        script = get_script_cache().get(script_key) if use_script_cache else None
 
-        def generate_script():
-            return client.models.generate_content(
-                model="gemini-2.5-flash-preview-05-20", 
-                contents=input_string, 
+        if script:
+            print("Reusing cached script for this article set")
+            if progress:
+                progress("script", 5, "Reusing a cached broadcast script")
+        else:
+            print("Generating script content...")
+            if progress:
+                progress("script", 5, "Writing the broadcast script")
+
+            response = client.generate_content_with_retry(
+                model=SCRIPT_MODEL,
+                contents=input_string,
                 config=types.GenerateContentConfig(max_output_tokens=10000)
-        )
+            )
+            script = response.text
 
-        response = retry_with_backoff(generate_script, max_retries=3)
+            if not script:
+                print("Error: No script content generated")
+                return
 
-        if not response.text:
-            print("Error: No script content generated")
-            return
+            if use_script_cache:
+                get_script_cache().put(script_key, script)
+            print("Script generated successfully, splitting into parts...")
 
-        print("Script generated successfully, splitting into parts...")
-        script_parts = split_script(response.text, duration)
-        print(f"Script split into {len(script_parts)} parts for {duration}-minute broadcast")
+        planned_parts = plan_script_parts(script, duration)
+        script_parts = [part for part, _ in planned_parts]
+        print(f"Script split into {len(script_parts)} parts for {duration}-minute broadcast "
+              f"(~{', '.join(f'{seconds:.0f}s' for _, seconds in planned_parts)})")
         if len(script_parts) == 0:
             print("Error: No script parts generated")
             return 
@@ -132,80 +313,55 @@ def generate_broadcast(urls, api_key, duration=5):
         #prompt = "This is a news broadcast between Sarah and John:\n" + response.text
 
         print("Generating audio content...")
+        if progress:
+            progress("audio", 30, f"Synthesizing {len(script_parts)} audio parts")
 
-        def generate_audio():
-
-            audio_datas = []
-            
-            for i, part in enumerate(script_parts):
-                print(f"Part {i + 1}/{len(script_parts)}: {part[:50]}...")
-                prompt = "This is a news broadcast between Sarah and John:\n" + part
-                
-                response = client.models.generate_content(
-                    model="gemini-2.5-flash-preview-tts",
-                    contents=prompt,
-                    config=types.GenerateContentConfig(
-                        response_modalities=["AUDIO"],
-                        speech_config=types.SpeechConfig(
-                            multi_speaker_voice_config=types.MultiSpeakerVoiceConfig(
-                                speaker_voice_configs=[
-                                    types.SpeakerVoiceConfig(
-                                        speaker='John',
-                                        voice_config=types.VoiceConfig(
-                                            prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                                                voice_name='Kore',
-                                            )
-                                        )
-                                    ),
-                                    types.SpeakerVoiceConfig(
-                                        speaker='Sarah',
-                                        voice_config=types.VoiceConfig(
-                                            prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                                                voice_name='Puck',
-                                            )
-                                        )
-                                    ),
-                                ]
-                            )
-                        )
-                    )
-                )
-                audio_datas.append(response.candidates[0].content.parts[0].inline_data.data)
-            return audio_datas
+        publisher = SegmentPublisher(os.path.dirname(os.path.abspath(output_path)), len(script_parts)) if progressive else None
 
+        def report_part(i, pcm, completed):
+            print(f"Finished audio part {i + 1}/{len(script_parts)} ({completed}/{len(script_parts)} done)")
+            if publisher is not None:
+                name = publisher.publish(i, pcm)
+                if progress:
+                    progress("segment_ready", None, f"Audio segment {i + 1} ready",
+                             data={'segment': i, 'name': name, 'playable_through': publisher.playable_through()})
+            if progress:
+                progress("audio", 30 + 60 * completed // len(script_parts), f"Synthesized {completed}/{len(script_parts)} audio parts")
 
-        audio_datas = retry_with_backoff(generate_audio, max_retries=3)
+        # Longest parts first finishes the whole broadcast soonest, but when it's
+        # played as it's synthesized the opening parts are needed first
+        expected_seconds = None if progressive else [seconds for _, seconds in planned_parts]
+        try:
+            pcm_parts = synthesize_parts(client, script_parts, max_workers=tts_workers, on_part=report_part,
+                                         cache=get_tts_cache() if use_tts_cache else None,
+                                         expected_seconds=expected_seconds)
+        except Exception as e:
+            if publisher is not None:
+                publisher.finish(error=str(e))
+            raise
+        if publisher is not None:
+            publisher.finish()
 
-        if not audio_datas or not any(audio_datas):
+        if not pcm_parts or not any(pcm_parts):
             print("Error: No audio content generated")
             return
 
-        pcm_parts = []
-
-        for i, data in enumerate(audio_datas):
-            print(f"Processing audio part {i + 1}/{len(audio_datas)}")
-            
-            if isinstance(data, str):
-                pcm = base64.b64decode(data)
-            elif isinstance(data, bytes):
-                try:
-                    # Try to decode as base64 first
-                    pcm = base64.b64decode(data)
-                except:
-                    # If that fails, assume it's already raw audio data
-                    pcm = data
-            else:
-                pcm = data
-            
-            pcm_parts.append(pcm)
-        
         full_audio_data = b''.join(pcm_parts)
 
 
         print("Writing audio to file...")
+        if progress:
+            progress("writing", 95, "Writing audio file")
+
+        wave_file(output_path, full_audio_data)
+        print(f"Audio file saved as {os.path.basename(output_path)} ({len(full_audio_data)} bytes)")
 
-        wave_file('Broadcast.wav', full_audio_data)
-        print(f"Audio file saved as Broadcast.wav ({len(full_audio_data)} bytes)")
+        if audio_format != 'wav':
+            if progress:
+                progress("encoding", 97, f"Encoding audio as {audio_format}")
+            output_path = encode_audio(output_path, audio_format)
+            print(f"Audio encoded as {os.path.basename(output_path)} ({os.path.getsize(output_path)} bytes)")
+        return output_path
 
     except Exception as e:
         print(f"Error in generate_broadcast: {str(e)}")
@@ -219,6 +375,12 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Generate broadcast from article URLs')
     parser.add_argument('--api-key', required=True, help='Gemini API key')
     parser.add_argument('--duration', type=int, default=5, help='Duration of the broadcast script (default: 5 minutes)')
+    parser.add_argument('--format', dest='audio_format', choices=list(AUDIO_FORMATS), default='wav', help='Output audio format; anything but wav needs ffmpeg (or flac) installed (default: wav)')
+    parser.add_argument('--input-token-budget', type=int, default=DEFAULT_INPUT_TOKEN_BUDGET, help=f'Tokens of article text allowed in the script prompt, 0 for no limit (default: {DEFAULT_INPUT_TOKEN_BUDGET})')
+    parser.add_argument('--no-script-cache', action='store_true', help='Always generate a fresh script instead of reusing a cached one')
+    parser.add_argument('--no-tts-cache', action='store_true', help='Always synthesize audio instead of reusing cached parts')
+    parser.add_argument('--progressive', action='store_true', help='Also write each part as a playable segment (segments.json + segment_NNN.wav) as soon as it is ready')
+    parser.add_argument('--tts-workers', type=int, default=TTS_WORKERS, help='Script parts synthesized concurrently (default: BRIEFLY_TTS_WORKERS, or as many as the TTS rate limit keeps busy)')
 
     parser.add_argument('urls', nargs='*', help='URLs of articles to include in broadcast')
     
@@ -242,5 +404,5 @@ if __name__ == "__main__":
         sys.exit(1)
 
     print(f"\nStarting broadcast generation with {len(urls)} articles...")
-    generate_broadcast(urls, api_key, duration)
+    generate_broadcast(urls, api_key, duration, tts_workers=args.tts_workers, progressive=args.progressive, audio_format=args.audio_format, use_script_cache=not args.no_script_cache, use_tts_cache=not args.no_tts_cache, input_token_budget=args.input_token_budget)
     print("Broadcast generation completed successfully!")
\ No newline at end of file
@@ -1,10 +1,15 @@
 # Gunicorn configuration
 bind = "127.0.0.1:5001"
+# A single worker process, since the job registry lives in memory. Pipelines
+# run in pipeline_workers' process pool, and threads let /health, job status
+# and event streams be served while other requests are open.
 workers = 1
-timeout = 1500  # 25 minutes
+worker_class = 'gthread'
+threads = 32
+timeout = 1500  # 25 minutes, for the legacy blocking endpoints
 keepalive = 300  # 5 minutes
-max_requests = 1000
-max_requests_jitter = 100
+# No periodic worker restarts: they would drop the in-memory job registry
+max_requests = 0
 preload_app = True
 
 # Logging configuration for real-time output
@@ -0,0 +1,143 @@
+"""
+In-memory registry of pipeline jobs and their progress events for api_server
+"""
+
+import threading
+import time
+import uuid
+
+# Finished jobs are forgotten after this many seconds
+JOB_RETENTION = 60 * 60
+
+FINISHED_STATES = ('succeeded', 'failed')
+
+# Stages whose data is part of the job's result (one topic's articles), kept
+# in partial_results and sent as "partial_result" events
+PARTIAL_RESULT_STAGES = ('topic_done',)
+
+
+class Job:
+    def __init__(self, kind, params=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params or {}
+        self.status = 'queued'
+        self.stage = 'queued'
+        self.percent = 0
+        self.message = None
+        self.result = None
+        self.error = None
+        self.output = None
+        self.partial_results = []
+        self.events = []
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'stage': self.stage,
+            'percent': self.percent,
+            'message': self.message,
+            'result': self.result,
+            'error': self.error,
+            'partial_results': self.partial_results,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+        }
+
+
+class JobManager:
+    def __init__(self):
+        self._jobs = {}
+        self._changed = threading.Condition()
+
+    def create(self, kind, params=None):
+        job = Job(kind, params)
+        with self._changed:
+            self._prune()
+            self._jobs[job.id] = job
+            self._add_event(job, 'status', job.to_dict())
+        return job
+
+    def get(self, job_id):
+        with self._changed:
+            return self._jobs.get(job_id)
+
+    def progress(self, job_id, stage, percent=None, message=None, data=None):
+        """
+        Record a progress update reported by a pipeline worker. Updates that
+        carry `data` for a PARTIAL_RESULT_STAGES stage (one topic's finished
+        articles) are kept in partial_results and sent as "partial_result"
+        events; other updates with `data` (e.g. "segment_ready") are sent as
+        events named after their stage.
+        """
+        with self._changed:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return
+            job.status = 'running'
+            job.stage = stage
+            if percent is not None:
+                job.percent = percent
+            job.message = message
+            job.updated_at = time.time()
+            event = {'stage': job.stage, 'percent': job.percent, 'message': message}
+            event_type = 'progress'
+            if data is not None:
+                event['data'] = data
+                if stage in PARTIAL_RESULT_STAGES:
+                    job.partial_results.append(data)
+                    event_type = 'partial_result'
+                else:
+                    event_type = stage
+            self._add_event(job, event_type, event)
+
+    def finish(self, job_id, success, result=None, error=None, output=None):
+        with self._changed:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.status = 'succeeded' if success else 'failed'
+            job.stage = 'done' if success else 'failed'
+            if success:
+                job.percent = 100
+            job.result = result
+            job.error = error
+            job.output = output
+            job.updated_at = time.time()
+            self._add_event(job, 'status', job.to_dict())
+
+    def events_since(self, job_id, after=-1, timeout=None):
+        """
+        Return (events, finished) for events with an id greater than `after`,
+        waiting up to `timeout` seconds for one to arrive
+        """
+        deadline = time.time() + timeout if timeout else None
+        with self._changed:
+            while True:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    return [], True
+                events = job.events[after + 1:]
+                if events or job.finished or deadline is None:
+                    return events, job.finished
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return [], False
+                self._changed.wait(remaining)
+
+    def _add_event(self, job, event_type, data):
+        job.events.append({'id': len(job.events), 'event': event_type, 'data': data, 'time': time.time()})
+        self._changed.notify_all()
+
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and job.updated_at < cutoff]:
+            del self._jobs[job_id]
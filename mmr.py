@@ -0,0 +1,90 @@
+"""
+Maximal Marginal Relevance (MMR) selection over embedding matrices
+"""
+
+import numpy as np
+
+
+def normalize_rows(matrix):
+    """L2-normalize each row, leaving all-zero rows as zeros (like sklearn's normalize)"""
+    matrix = np.asarray(matrix, dtype=np.float64)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def first_copies(matrix, key_columns=32):
+    """For each row of a float64 matrix, the index of the first row identical to it"""
+    # Candidates first, by a hash of each row's leading values. It uses wrapping
+    # integer arithmetic on their bits, so equal rows always get equal keys.
+    bits = np.ascontiguousarray(matrix).view(np.uint64)[:, :key_columns]
+    weights = np.arange(1, 2 * bits.shape[1], 2, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    keys = (bits * weights).sum(axis=1, dtype=np.uint64)
+
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    copy_of = first[inverse.reshape(-1)]
+
+    copies = np.flatnonzero(copy_of != np.arange(len(matrix)))
+    if copies.size and (matrix[copy_of[copies]] != matrix[copies]).any():
+        # Different rows that share a key: match whole rows instead
+        first = {}
+        return np.array([first.setdefault(row.tobytes(), i) for i, row in enumerate(matrix)])
+    return copy_of
+
+
+def mmr_filter(embeddings, query_embedding, k, lambda_param=0.5):
+    """
+    Filters items using Maximal Marginal Relevance (MMR).
+
+    The embedding matrix is normalized once, and a running vector of each
+    item's max similarity to the selected set is updated with a single
+    matrix-vector product per round, so a round costs O(n·d) instead of
+    re-scoring every remaining item against every selected item.
+
+    Copies of one embedding (e.g. a syndicated story) always get exactly the
+    same scores, so ties go to the lowest index as in the original per-item
+    loop; a BLAS product alone can round identical rows differently.
+
+    Args:
+        embeddings: A list or array of embeddings for the items.
+        query_embedding: The embedding for the query.
+        k: The number of items to select.
+        lambda_param: The balance parameter between relevance and diversity (0 to 1).
+                      Higher values favor relevance, lower values favor diversity.
+
+    Returns:
+        A list of indices of the selected items.
+    """
+    if len(embeddings) == 0:
+        return []
+
+    items = normalize_rows(embeddings)
+    query = normalize_rows(np.asarray(query_embedding).reshape(1, -1))[0]
+
+    copy_of = first_copies(items)
+
+    relevance_scores = (items @ query)[copy_of]
+    relevance_term = lambda_param * relevance_scores
+
+    # No diversity penalty until something has been selected
+    max_similarity = np.zeros(len(items))
+    available = np.ones(len(items), dtype=bool)
+
+    selected_indices = []
+    for _ in range(min(k, len(items))):
+        mmr_scores = relevance_term - (1 - lambda_param) * max_similarity
+        mmr_scores[~available] = -np.inf
+
+        # argmax returns the first maximum, i.e. ties go to the lowest index
+        best_item_index = int(np.argmax(mmr_scores))
+
+        similarity = (items @ items[best_item_index])[copy_of]
+        if selected_indices:
+            np.maximum(max_similarity, similarity, out=max_similarity)
+        else:
+            max_similarity = similarity
+
+        selected_indices.append(best_item_index)
+        available[best_item_index] = False
+
+    return selected_indices
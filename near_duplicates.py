@@ -0,0 +1,102 @@
+"""
+MinHash near-duplicate detection, used to collapse syndicated copies of the
+same story (one wire article under several publishers) into one article
+"""
+
+import re
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+# Modulus of the MinHash permutations (a Mersenne prime, so a*x+b fits in uint64)
+_PRIME = (1 << 31) - 1
+
+
+def shingles(text, k=5):
+    """Set of hashed k-word shingles of `text`, ignoring case and punctuation"""
+    words = re.findall(r'\w+', (text or '').lower())
+    if len(words) < k:
+        words = [' '.join(words)] if words else []
+        k = 1
+    return {zlib.crc32(' '.join(words[i:i + k]).encode('utf-8')) & _PRIME for i in range(len(words) - k + 1)}
+
+
+def minhash_signatures(shingle_sets, num_perm=128, seed=1):
+    """
+    MinHash signature of each shingle set
+
+    Returns:
+        A (len(shingle_sets), num_perm) uint64 array; the fraction of equal
+        positions in two rows estimates the Jaccard similarity of the sets.
+    """
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, _PRIME, size=num_perm).astype(np.uint64)
+    b = rng.randint(0, _PRIME, size=num_perm).astype(np.uint64)
+    signatures = np.full((len(shingle_sets), num_perm), _PRIME, dtype=np.uint64)
+    for i, hashes in enumerate(shingle_sets):
+        if hashes:
+            x = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+            signatures[i] = ((a[:, None] * x[None, :] + b[:, None]) % _PRIME).min(axis=1)
+    return signatures
+
+
+def near_duplicate_groups(documents, threshold=0.6, num_perm=128, bands=32):
+    """
+    Group documents whose estimated Jaccard similarity is at least `threshold`
+
+    Candidate pairs come from locality-sensitive hashing over `bands` bands of
+    the MinHash signatures, and are then checked against the full signature.
+
+    Returns:
+        A list of groups (lists of document indices) with two or more members.
+    """
+    shingle_sets = [shingles(document) for document in documents]
+    signatures = minhash_signatures(shingle_sets, num_perm)
+    rows = num_perm // bands
+
+    parent = list(range(len(documents)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for band in range(bands):
+        buckets = defaultdict(list)
+        for i, hashes in enumerate(shingle_sets):
+            if hashes:
+                buckets[signatures[i, band * rows:(band + 1) * rows].tobytes()].append(i)
+        for members in buckets.values():
+            for j in members[1:]:
+                first, other = find(members[0]), find(j)
+                if first != other and np.mean(signatures[members[0]] == signatures[j]) >= threshold:
+                    parent[other] = first
+
+    groups = defaultdict(list)
+    for i in range(len(documents)):
+        groups[find(i)].append(i)
+    return [members for members in groups.values() if len(members) > 1]
+
+
+def canonical_indices(documents, rank=None, threshold=0.6):
+    """
+    Map every document to the canonical copy of its near-duplicate group
+
+    Args:
+        documents: Texts to compare.
+        rank: Optional sortable score per document; the highest-ranked member of a group
+              is its canonical copy (ties go to the earliest document).
+        threshold: Minimum estimated Jaccard similarity of duplicates.
+
+    Returns:
+        A list with the canonical document index for each document.
+    """
+    rank = rank if rank is not None else [0] * len(documents)
+    canonical = list(range(len(documents)))
+    for members in near_duplicate_groups(documents, threshold):
+        best = max(members, key=lambda i: (rank[i], -i))
+        for i in members:
+            canonical[i] = best
+    return canonical
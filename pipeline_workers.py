@@ -0,0 +1,362 @@
+"""
+Pool of long-lived pipeline worker processes for api_server
+
+Each worker imports find_articles and generateBroadcast once, together with
+their heavy dependencies, and keeps GenAI clients, HTTP sessions and the
+on-disk caches open between jobs. A request then only pays for the pipeline
+work itself, not for interpreter startup and imports.
+
+Jobs can be given a timeout, counted from when a worker picks them up, and
+can be cancelled while running: the job's worker process is terminated and
+a fresh one is started in its place.
+"""
+
+import contextlib
+import importlib
+import io
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import CancelledError, Future, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Number of pipelines that can run at the same time
+PIPELINE_WORKERS = int(os.environ.get('BRIEFLY_PIPELINE_WORKERS', '2'))
+
+# Lazily imported by the pipelines; loaded up front so the first job is warm
+WARM_MODULES = ['newspaper', 'gnews', 'googlenewsdecoder', 'google.genai']
+
+# Modules whose install() runs in each worker before the pipelines are
+# imported, e.g. BRIEFLY_WORKER_PRELOAD=fake_backends for offline benchmarks
+PRELOAD_MODULES = [name for name in os.environ.get('BRIEFLY_WORKER_PRELOAD', '').split(',') if name]
+
+# Seconds between checks of a running job's timeout and cancellation
+POLL_INTERVAL = 0.5
+
+# Seconds a terminated worker gets to exit before it is killed
+TERMINATE_GRACE = 5
+
+_pool = None
+_pool_lock = threading.Lock()
+_progress_handler = None
+
+# Worker side: sends a message to the server over the worker's pipe (set by _worker_main)
+_send = None
+
+
+class _Tee(io.TextIOBase):
+    """Copy everything written to a stream into a buffer as well"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffer = io.StringIO()
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        with self._lock:
+            self.stream.write(text)
+            self.buffer.write(text)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def getvalue(self):
+        return self.buffer.getvalue()
+
+
+def _warm_up():
+    """Import the pipelines and their dependencies once, when a worker starts"""
+    os.chdir(PROJECT_DIR)
+    if PROJECT_DIR not in sys.path:
+        sys.path.insert(0, PROJECT_DIR)
+    for module in PRELOAD_MODULES:
+        importlib.import_module(module).install()
+    import find_articles  # noqa: F401
+    import generateBroadcast  # noqa: F401
+    for module in WARM_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            print(f"⚠️ Could not preload {module}: {e}", flush=True)
+    print(f"Pipeline worker {os.getpid()} ready", flush=True)
+
+
+def _worker_main(connection):
+    """
+    Worker process: warm up, then run the jobs received over `connection`
+    one at a time, sending back their progress events and outcome
+    """
+    global _send
+    send_lock = threading.Lock()
+
+    def send(message):
+        # Pipelines report progress from several threads at once
+        with send_lock:
+            connection.send(message)
+
+    _send = send
+    _warm_up()
+    send(('ready', None))
+    while True:
+        try:
+            job = connection.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        func, job_id, args = job
+        send(('result', _run_captured(func, job_id, *args)))
+
+
+def _progress_reporter(job_id):
+    """Return a progress(stage, percent, message, data) callback that forwards to the server"""
+    if job_id is None or _send is None:
+        return None
+
+    def progress(stage, percent=None, message=None, data=None):
+        _send(('progress', (job_id, stage, percent, message, data)))
+
+    return progress
+
+
+def _run_captured(func, job_id, *args):
+    """Run a pipeline function, returning its result along with everything it printed"""
+    tee = _Tee(sys.stdout)
+    with contextlib.redirect_stdout(tee):
+        try:
+            result = func(*args, progress=_progress_reporter(job_id))
+            return {'success': True, 'result': result, 'output': tee.getvalue()}
+        except Exception as e:
+            traceback.print_exc(file=tee)
+            return {'success': False, 'error': str(e), 'output': tee.getvalue()}
+        finally:
+            sys.stdout.flush()
+
+
+def _fetch_articles_job(topics, api_key, stream, output_path, progress=None):
+    import find_articles
+
+    df = find_articles.fetch_articles(topics, api_key, output_path=output_path, progress=progress, stream=stream)
+    return len(df)
+
+
+def _generate_broadcast_job(urls, api_key, duration, output_path, progressive, audio_format, progress=None):
+    import generateBroadcast
+
+    return generateBroadcast.generate_broadcast(urls, api_key, duration, output_path=output_path,
+                                                progress=progress, progressive=progressive, audio_format=audio_format)
+
+
+def _report_progress(event):
+    handler = _progress_handler
+    if handler is not None:
+        try:
+            handler(*event)
+        except Exception as e:
+            print(f"Error handling progress event: {e}", flush=True)
+
+
+def set_progress_handler(handler):
+    """Receive worker progress as handler(job_id, stage, percent, message, data)"""
+    global _progress_handler
+    _progress_handler = handler
+
+
+class PipelineFuture(Future):
+    """A Future whose cancel() also stops a job that is already running"""
+
+    def __init__(self):
+        super().__init__()
+        self._stop_requested = threading.Event()
+
+    def cancel(self):
+        """
+        Cancel the job. A queued job is simply dropped; a running one has its
+        worker process terminated, and the future fails with CancelledError.
+        """
+        if super().cancel():
+            return True
+        if self.done():
+            return False
+        self._stop_requested.set()
+        return True
+
+    def stop_requested(self):
+        return self._stop_requested.is_set()
+
+
+class WorkerPool:
+    def __init__(self, workers, context):
+        """
+        Start `workers` warm worker processes, each served by a thread of this
+        process that hands it queued jobs and watches their deadlines
+
+        Args:
+            workers: Number of jobs run at the same time
+            context: multiprocessing context the workers are started with
+        """
+        self.context = context
+        self._jobs = queue.Queue()
+        self._threads = [
+            threading.Thread(target=self._serve, name=f"pipeline-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, func, job_id, args, timeout=None):
+        """
+        Queue func(*args, progress=...) to run on a worker
+
+        Args:
+            timeout: Seconds the job may run once a worker has started it
+                     (time spent queued doesn't count); None for no limit
+        """
+        future = PipelineFuture()
+        self._jobs.put((future, (func, job_id, args), timeout))
+        return future
+
+    def _start_worker(self):
+        connection, child_connection = self.context.Pipe()
+        process = self.context.Process(target=_worker_main, args=(child_connection,), daemon=True)
+        process.start()
+        child_connection.close()
+        return process, connection
+
+    def _stop_worker(self, process, connection):
+        process.terminate()
+        process.join(TERMINATE_GRACE)
+        if process.is_alive():
+            process.kill()
+            process.join()
+        connection.close()
+
+    def _run(self, connection, future, job, timeout):
+        """Send `job` to the worker on `connection` and wait for its outcome"""
+        connection.send(job)
+        deadline = time.monotonic() + timeout if timeout else None
+        while True:
+            if connection.poll(POLL_INTERVAL):
+                kind, payload = connection.recv()
+                if kind == 'result':
+                    return payload
+                _report_progress(payload)
+            if future.stop_requested():
+                raise CancelledError()
+            if deadline is not None and time.monotonic() >= deadline:
+                raise FutureTimeoutError(f"Pipeline job timed out after {timeout} seconds")
+
+    def _serve(self):
+        process, connection = self._start_worker()
+        ready = False
+        while True:
+            item = self._jobs.get()
+            if item is None:
+                break
+            future, job, timeout = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            if not process.is_alive():
+                # Died while idle (e.g. killed by the OS); don't fail the job over it
+                connection.close()
+                process, connection = self._start_worker()
+                ready = False
+            try:
+                if not ready:
+                    # Wait for the imports to finish, so they don't count against the timeout
+                    connection.recv()
+                    ready = True
+                outcome = self._run(connection, future, job, timeout)
+            # (TimeoutError is an OSError on Python 3.11+, so it's caught first)
+            except (CancelledError, FutureTimeoutError) as e:
+                error = e
+            except (EOFError, OSError):
+                process.join(TERMINATE_GRACE)
+                error = BrokenProcessPool(f"Pipeline worker {process.pid} exited unexpectedly (exit code {process.exitcode})")
+            else:
+                future.set_result(outcome)
+                continue
+            print(f"⚠️ Stopping pipeline worker {process.pid}: {str(error) or 'job cancelled'}", flush=True)
+            self._stop_worker(process, connection)
+            process, connection = self._start_worker()
+            ready = False
+            future.set_exception(error)
+
+        try:
+            connection.send(None)
+        except OSError:
+            pass
+        process.join(TERMINATE_GRACE)
+        if process.is_alive():
+            self._stop_worker(process, connection)
+
+    def shutdown(self):
+        """Drop queued jobs and stop the workers once their current jobs are done"""
+        while True:
+            try:
+                item = self._jobs.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[0].cancel()
+        for _ in self._threads:
+            self._jobs.put(None)
+
+
+def get_pool():
+    """Return the worker pool, starting it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn rather than fork: the server is multi-threaded, and forking
+            # it could copy held locks into the workers
+            _pool = WorkerPool(PIPELINE_WORKERS, multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def submit_fetch_articles(topics, api_key, output_path, job_id=None, stream=False, timeout=None):
+    """
+    Queue an article fetch on the worker pool, saving the CSV to `output_path`.
+    Progress is reported to the progress handler under `job_id`, if given;
+    with stream=True that includes a "topic_done" event carrying each topic's
+    articles as it completes. A job still running `timeout` seconds after it
+    started is stopped and its future fails with TimeoutError.
+
+    Returns:
+        A PipelineFuture resolving to {'success', 'result' or 'error', 'output'},
+        where 'result' is the number of articles saved.
+    """
+    return get_pool().submit(_fetch_articles_job, job_id, (topics, api_key, stream, output_path), timeout)
+
+
+def submit_generate_broadcast(urls, api_key, output_path, duration=5, job_id=None, progressive=False, audio_format='wav', timeout=None):
+    """
+    Queue a broadcast generation on the worker pool, writing the audio to
+    `output_path` (re-encoded to `audio_format` unless that is 'wav').
+    Progress is reported to the progress handler under `job_id`, if given.
+    With progressive=True each part is also published as a playable segment
+    next to `output_path` as soon as it is ready. A job still running
+    `timeout` seconds after it started is stopped and its future fails with
+    TimeoutError.
+
+    Returns:
+        A PipelineFuture resolving to {'success', 'result' or 'error', 'output'},
+        where 'result' is the path of the generated audio file (or None).
+    """
+    return get_pool().submit(_generate_broadcast_job, job_id,
+                             (urls, api_key, duration, output_path, progressive, audio_format), timeout)
+
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
@@ -0,0 +1,120 @@
+"""
+Shrink scraped article text before it goes into the broadcast script prompt:
+drop repeated paragraphs and site boilerplate, then share a token budget
+between the articles
+"""
+
+import os
+import re
+
+# Rough size of a token for English prose
+CHARS_PER_TOKEN = 4
+
+DEFAULT_INPUT_TOKEN_BUDGET = int(os.environ.get('BRIEFLY_INPUT_TOKEN_BUDGET', 30000))
+
+# Paragraphs that are site furniture rather than news
+BOILERPLATE_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in [
+    r'^\[[^\]]*(download|sign up|subscribe|watch|listen|read more|related)[^\]]*\]$',
+    r'^(trending|related|recommended|more) (stories|articles|coverage|news)\s*:?$',
+    r'^(advertisement|sponsored|skip advertisement|story continues below.*)$',
+    r'^(©|\(c\)|copyright)\s*\d{4}',
+    r'all rights reserved\.?$',
+    r'^(click|tap) here\b',
+    r'^(sign up|subscribe)\b.*\b(newsletter|alerts|updates|now|today)\b',
+    r'^follow (us|.* on) (on )?(twitter|x|facebook|instagram|threads)',
+    r'^share (this|on)\b',
+    r'\bicon an icon in the shape of\b',
+    r'^this (story|article) is available exclusively to\b',
+    r'^(get|download) the .* app\b',
+]]
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _normalize(paragraph):
+    return ' '.join(re.sub(r'[^\w\s]', ' ', paragraph.lower()).split())
+
+
+def is_boilerplate(paragraph):
+    return any(pattern.search(paragraph) for pattern in BOILERPLATE_PATTERNS)
+
+
+def clean_text(text, title=None):
+    """
+    Remove boilerplate and repeated paragraphs from scraped article text
+
+    A paragraph is dropped if it repeats the title or is already contained in
+    an earlier paragraph (scrapers often emit the lede and its caption
+    several times over).
+    """
+    kept = []
+    seen = [_normalize(title)] if title else []
+    for paragraph in re.split(r'\n\s*\n', text or ''):
+        paragraph = ' '.join(paragraph.split())
+        if not paragraph or is_boilerplate(paragraph):
+            continue
+        normalized = _normalize(paragraph)
+        if not normalized or any(normalized in earlier for earlier in seen):
+            continue
+        kept.append(paragraph)
+        seen.append(normalized)
+    return '\n\n'.join(kept)
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Cut text to about `max_tokens`, at a paragraph boundary where possible"""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    paragraphs = text.split('\n\n')
+    kept = []
+    length = 0
+    for paragraph in paragraphs:
+        if length + len(paragraph) > max_chars:
+            break
+        kept.append(paragraph)
+        length += len(paragraph) + 2
+    if kept:
+        return '\n\n'.join(kept)
+    # The first paragraph alone is over budget: cut it at a word boundary
+    return text[:max_chars].rsplit(' ', 1)[0]
+
+
+def allocate_budget(sizes, budget):
+    """
+    Split a token budget between articles: each gets an equal share, and
+    what short articles don't use is handed on to the longer ones.
+
+    Returns:
+        The token allowance for each article, in order.
+    """
+    allowances = [0] * len(sizes)
+    remaining = budget
+    pending = sorted(range(len(sizes)), key=lambda i: sizes[i])
+    while pending:
+        share = remaining // len(pending)
+        i = pending.pop(0)
+        allowances[i] = min(sizes[i], share)
+        remaining -= allowances[i]
+    return allowances
+
+
+def compact_articles(articles, token_budget=DEFAULT_INPUT_TOKEN_BUDGET):
+    """
+    Clean every article's text and fit the total into `token_budget`
+
+    Args:
+        articles: Dicts with 'title' and 'text'
+        token_budget: Tokens of article text allowed in the prompt (None or 0 for no limit)
+
+    Returns:
+        Copies of the articles with compacted 'text'.
+    """
+    compacted = [dict(article, text=clean_text(article.get('text'), article.get('title'))) for article in articles]
+    if token_budget:
+        sizes = [estimate_tokens(article['text']) for article in compacted]
+        for article, allowance in zip(compacted, allocate_budget(sizes, token_budget)):
+            article['text'] = truncate_to_tokens(article['text'], allowance)
+    return compacted
@@ -0,0 +1,58 @@
+"""
+Thread-safe token bucket rate limiter shared by the pipeline's worker pools
+(and by coroutines, through acquire_async)
+"""
+
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        """
+        Initialize the token bucket
+
+        Args:
+            rate: Tokens added per second. None or 0 disables limiting.
+            capacity: Maximum burst size (defaults to one second's worth of tokens)
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate or 1.0)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def _take(self, tokens):
+        """Consume `tokens` if available and return 0, else return the seconds to wait"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens=1):
+        """Block until `tokens` are available, then consume them"""
+        if not self.rate:
+            return
+        while True:
+            wait = self._take(tokens)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens=1):
+        """Like acquire, but waits with asyncio.sleep so the event loop keeps running"""
+        if not self.rate:
+            return
+        while True:
+            wait = self._take(tokens)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
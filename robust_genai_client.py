@@ -1,26 +1,273 @@
 #!/usr/bin/env python3
 
 """
-Robust Google AI API wrapper with retry logic and better error handling
+Robust Google AI API wrapper with retry logic and better error handling,
+shared by the find_articles and generateBroadcast pipelines
 """
 
-import time
+import asyncio
+import os
 import random
-from google import genai
-from google.genai import types
+import threading
+import time
 import traceback
+import weakref
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+
+from rate_limiter import TokenBucket
+
+# Requests per second allowed for each model, shared by all threads in the
+# process (None = unlimited). Override with BRIEFLY_MODEL_RATES, e.g.
+# "text-embedding-004=25,gemini-2.5-flash-preview-tts=1".
+MODEL_RATES = {
+    "text-embedding-004": 25.0,
+    "gemini-2.5-flash-preview-05-20": 5.0,
+    "gemini-2.5-flash-preview-tts": 2.0,
+}
+DEFAULT_MODEL_RATE = None
+for _entry in filter(None, os.environ.get("BRIEFLY_MODEL_RATES", "").split(",")):
+    _model, _rate = _entry.split("=")
+    MODEL_RATES[_model.strip()] = float(_rate)
+
+# HTTP status codes worth retrying; anything else (bad request, auth, ...) fails at once
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+# Longest server-requested wait (Retry-After) we sit out; a longer one fails fast
+MAX_RETRY_AFTER = 60
+
+# Statuses that mean the service itself is failing, as opposed to this key's
+# quota running out (429); only these count towards opening a circuit
+SERVER_FAILURE_STATUS_CODES = {408, 500, 502, 503, 504}
+
+# Consecutive server-side failures on a key and model that open its circuit,
+# and how long it stays open before a single trial request is let through
+BREAKER_FAILURES = 5
+BREAKER_RESET = 30
+
+# AsyncRobustGenAIClient: requests in flight at once, and seconds allowed per attempt
+ASYNC_CONCURRENCY = 8
+ASYNC_TIMEOUT = 120
+
+# API keys whose clients, rate limiters and breakers are kept per process;
+# the least recently used key's are dropped beyond this
+MAX_CACHED_KEYS = int(os.environ.get("BRIEFLY_MAX_CACHED_KEYS", 32))
+
+_clients = OrderedDict()
+_robust_clients = OrderedDict()
+_async_clients = OrderedDict()
+_limiters = OrderedDict()
+_breakers = OrderedDict()
+_registry_lock = threading.Lock()
+
+def _cached(registry, key, create, size=MAX_CACHED_KEYS):
+    """Return registry[key], creating it if needed and evicting the least recently used entry past `size`"""
+    with _registry_lock:
+        if key in registry:
+            registry.move_to_end(key)
+            return registry[key]
+    value = create()
+    with _registry_lock:
+        value = registry.setdefault(key, value)
+        registry.move_to_end(key)
+        while len(registry) > size:
+            registry.popitem(last=False)
+        return value
+
+def get_client(api_key):
+    """
+    Return a genai.Client for `api_key`, creating it on first use.
+
+    Long-lived processes (the api_server pipeline workers) reuse one client,
+    and its HTTP connection pool, per key instead of building one per request.
+    """
+    from google import genai
+
+    return _cached(_clients, api_key, lambda: genai.Client(api_key=api_key))
+
+_loop = None
+_loop_lock = threading.Lock()
+
+def run_async(coroutine):
+    """
+    Run `coroutine` on this process's long-lived event loop and return its
+    result, blocking the calling thread until it's done.
+
+    Unlike asyncio.run(), which starts and closes a loop per call, this keeps
+    one loop running in a background thread, so async clients and their
+    connections can be reused from call to call.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="genai-event-loop", daemon=True).start()
+        loop = _loop
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coroutine.close()
+        raise RuntimeError("run_async() would deadlock on its own event loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+def get_robust_client(api_key):
+    """Return this process's shared RobustGenAIClient for `api_key`"""
+    return _cached(_robust_clients, api_key, lambda: RobustGenAIClient(api_key))
+
+def get_async_robust_client(api_key):
+    """Return this process's shared AsyncRobustGenAIClient for `api_key`"""
+    return _cached(_async_clients, api_key, lambda: AsyncRobustGenAIClient(api_key))
+
+def limiter_for(api_key, model):
+    """
+    Shared token bucket for `model` under `api_key`; quotas are per key,
+    so one key running out of requests doesn't slow down the others
+    """
+    return _cached(_limiters, (api_key, model), lambda: TokenBucket(MODEL_RATES.get(model, DEFAULT_MODEL_RATE)),
+                   MAX_CACHED_KEYS * len(MODEL_RATES))
+
+def breaker_for(api_key, model):
+    """Shared circuit breaker for `model` under `api_key`"""
+    return _cached(_breakers, (api_key, model), lambda: CircuitBreaker(model),
+                   MAX_CACHED_KEYS * len(MODEL_RATES))
+
+def status_code(error):
+    """HTTP status of an API error (google.genai.errors.APIError carries it in .code), or None"""
+    code = getattr(error, 'code', None)
+    if code is None:
+        code = getattr(getattr(error, 'response', None), 'status_code', None)
+    return code if isinstance(code, int) else None
+
+def is_retryable(error):
+    """Retry on throttling, server errors and network failures, never on client errors"""
+    code = status_code(error)
+    if code is not None:
+        return code in RETRYABLE_STATUS_CODES
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    try:
+        import httpx
+    except ImportError:
+        return False
+    return isinstance(error, (httpx.TimeoutException, httpx.NetworkError))
+
+def is_server_failure(error):
+    """
+    True if `error` means the service is down or struggling (5xx, timeouts,
+    network errors). Throttling (429) is retried but doesn't count: it's this
+    key's quota, and the service is answering fine.
+    """
+    code = status_code(error)
+    if code is not None:
+        return code in SERVER_FAILURE_STATUS_CODES
+    return is_retryable(error)
+
+def retry_after(error):
+    """
+    Seconds the server asked us to wait: the Retry-After header, or the
+    RetryInfo delay Gemini puts in 429 error details. None if neither is given.
+    """
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    value = headers.get('retry-after') or headers.get('Retry-After')
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+
+    details = getattr(error, 'details', None)
+    if isinstance(details, dict):
+        for detail in details.get('error', {}).get('details', []) or []:
+            delay = detail.get('retryDelay') if isinstance(detail, dict) else None
+            if isinstance(delay, str) and delay.endswith('s'):
+                try:
+                    return float(delay[:-1])
+                except ValueError:
+                    pass
+    return None
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a model whose circuit breaker is open"""
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=None, reset_timeout=None):
+        """
+        Stop calling a model after sustained failures
+
+        Args:
+            name: Model the breaker guards (for messages)
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds before a trial request is allowed again
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold or BREAKER_FAILURES
+        self.reset_timeout = reset_timeout or BREAKER_RESET
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """
+        Raise CircuitOpenError if the circuit is open; let one trial through
+        once it may have recovered. Returns True for that trial call, which
+        must call end_trial() when it's over.
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return False
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0 or self._trial_running:
+                raise CircuitOpenError(f"{self.name} is failing, not calling it for another {max(remaining, 0):.0f}s")
+            self._trial_running = True
+            return True
+
+    def end_trial(self):
+        """Let another trial through, e.g. after this one was cancelled before it recorded a result"""
+        with self._lock:
+            self._trial_running = False
+
+    def is_open(self):
+        with self._lock:
+            return self.opened_at is not None
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    print(f"🚫 Opening circuit for {self.name} after {self.failures} consecutive failures")
+                self.opened_at = time.monotonic()
+            self._trial_running = False
 
 class RobustGenAIClient:
     def __init__(self, api_key, max_retries=3, base_delay=1):
         """
         Initialize the robust GenAI client
-        
+
+        Calls are rate limited per key and model, retried with exponential
+        backoff on throttling, server and network errors (honoring
+        Retry-After), and short-circuited while the model's circuit breaker
+        for this key is open.
+
         Args:
             api_key: Your Google AI API key
             max_retries: Maximum number of retry attempts
             base_delay: Base delay between retries (seconds)
         """
-        self.client = genai.Client(api_key=api_key)
+        self.api_key = api_key
+        self.client = get_client(api_key)
         self.max_retries = max_retries
         self.base_delay = base_delay
     
@@ -29,105 +276,203 @@ class RobustGenAIClient:
         delay = self.base_delay * (2 ** attempt)
         jitter = random.uniform(0.1, 0.3) * delay
         return delay + jitter
-    
-    def _is_retryable_error(self, error):
-        """Check if an error is worth retrying"""
-        error_str = str(error).lower()
-        
-        # Retryable server errors
-        retryable_conditions = [
-            '500',  # Internal server error
-            '502',  # Bad gateway
-            '503',  # Service unavailable  
-            '504',  # Gateway timeout
-            'internal error',
-            'temporarily unavailable',
-            'service unavailable',
-            'timeout'
-        ]
-        
-        return any(condition in error_str for condition in retryable_conditions)
-    
-    def generate_content_with_retry(self, model, contents, config=None):
+
+    def _retry_delay(self, error, attempt):
         """
-        Generate content with automatic retry logic
+        Seconds to wait before retrying after `error`, or None if it
+        shouldn't be retried.
         """
-        last_error = None
-        
+        if not is_retryable(error) or attempt >= self.max_retries:
+            return None
+        requested = retry_after(error)
+        if requested is not None:
+            if requested > MAX_RETRY_AFTER:
+                # The quota won't be back in time to be worth waiting for
+                return None
+            return max(requested, self.base_delay)
+        return self._exponential_backoff_delay(attempt)
+
+    def call(self, model, request, description="request"):
+        """
+        Run request() (one API call to `model`) with rate limiting,
+        retries and circuit breaking
+        """
+        limiter = limiter_for(self.api_key, model)
+        breaker = breaker_for(self.api_key, model)
+
         for attempt in range(self.max_retries + 1):
+            trial = breaker.before_call()
             try:
-                print(f"🔄 Attempt {attempt + 1}/{self.max_retries + 1} for content generation...")
-                
-                response = self.client.models.generate_content(
-                    model=model,
-                    contents=contents,
-                    config=config
-                )
-                
-                print(f"✅ Content generation successful on attempt {attempt + 1}")
-                return response
-                
+                limiter.acquire()
+                response = request()
             except Exception as e:
-                last_error = e
-                error_msg = str(e)
-                
-                print(f"❌ Attempt {attempt + 1} failed: {error_msg}")
-                
-                # Don't retry if it's not a retryable error
-                if not self._is_retryable_error(e):
-                    print(f"🚫 Error is not retryable, aborting: {error_msg}")
-                    break
-                
-                # Don't delay after the last attempt
-                if attempt < self.max_retries:
-                    delay = self._exponential_backoff_delay(attempt)
-                    print(f"⏳ Waiting {delay:.1f} seconds before retry...")
-                    time.sleep(delay)
-        
-        print(f"💥 All retry attempts failed. Last error: {last_error}")
-        raise last_error
+                error = e
+                if is_server_failure(e):
+                    breaker.record_failure()
+                else:
+                    # The model answered; the request was bad or over quota
+                    breaker.record_success()
+            else:
+                breaker.record_success()
+                return response
+            finally:
+                # Also on KeyboardInterrupt and the like, or the circuit would never close
+                if trial:
+                    breaker.end_trial()
+
+            delay = self._retry_delay(error, attempt)
+            if delay is None or breaker.is_open():
+                print(f"❌ {description} to {model} failed after {attempt + 1} attempt(s): {error}")
+                raise error
+            print(f"⚠️ {description} to {model} failed (attempt {attempt + 1}/{self.max_retries + 1}): {error}")
+            print(f"⏳ Retrying in {delay:.1f} seconds...")
+            time.sleep(delay)
+
+    def generate_content_with_retry(self, model, contents, config=None):
+        """
+        Generate content with automatic retry logic
+        """
+        return self.call(
+            model,
+            lambda: self.client.models.generate_content(model=model, contents=contents, config=config),
+            "Content generation",
+        )
     
     def embed_content_with_retry(self, model, contents, config=None):
         """
         Generate embeddings with automatic retry logic
         """
-        last_error = None
-        
+        return self.call(
+            model,
+            lambda: self.client.models.embed_content(model=model, contents=contents, config=config),
+            "Embedding request",
+        )
+
+class AsyncRobustGenAIClient(RobustGenAIClient):
+    def __init__(self, api_key, max_retries=3, base_delay=1, max_concurrency=None, timeout=None):
+        """
+        asyncio variant of RobustGenAIClient, built on the SDK's async client
+        (client.aio). Its request methods are coroutines, so many calls can be
+        in flight from one event loop, e.g. with asyncio.gather, or from
+        blocking code through run_async(). Rate limits
+        and circuit breakers are shared with the blocking client.
+
+        Args:
+            api_key: Your Google AI API key
+            max_retries: Maximum number of retry attempts
+            base_delay: Base delay between retries (seconds)
+            max_concurrency: Most requests in flight at once (defaults to ASYNC_CONCURRENCY)
+            timeout: Deadline for each attempt in seconds (defaults to ASYNC_TIMEOUT)
+        """
+        super().__init__(api_key, max_retries, base_delay)
+        self.max_concurrency = max_concurrency or ASYNC_CONCURRENCY
+        self.timeout = timeout or ASYNC_TIMEOUT
+        self._per_loop = weakref.WeakKeyDictionary()
+        self._per_loop_lock = threading.Lock()
+
+    def _loop_state(self):
+        # asyncio primitives and the SDK's async transport belong to the event
+        # loop they were first used on (each asyncio.run() starts a new one),
+        # so each loop gets its own semaphore and async client
+        loop = asyncio.get_running_loop()
+        with self._per_loop_lock:
+            state = self._per_loop.get(loop)
+            if state is None:
+                from google import genai
+
+                state = self._per_loop[loop] = (
+                    asyncio.Semaphore(self.max_concurrency),
+                    genai.Client(api_key=self.api_key).aio,
+                )
+            return state
+
+    def _concurrency_limit(self):
+        return self._loop_state()[0]
+
+    def _aio(self):
+        """The SDK's async client (client.aio) for the running event loop"""
+        return self._loop_state()[1]
+
+    async def call(self, model, request, description="request", timeout=None, deadline=None):
+        """
+        Await request() (a coroutine function making one API call to `model`)
+        with bounded concurrency, a per-attempt timeout, rate limiting,
+        retries and circuit breaking.
+
+        Args:
+            timeout: Seconds allowed per attempt (defaults to self.timeout)
+            deadline: Optional total seconds for all attempts, including backoff
+        """
+        limiter = limiter_for(self.api_key, model)
+        breaker = breaker_for(self.api_key, model)
+        timeout = timeout or self.timeout
+        give_up_at = time.monotonic() + deadline if deadline else None
+
         for attempt in range(self.max_retries + 1):
+            trial = breaker.before_call()
+            attempt_timeout = timeout
             try:
-                print(f"🔄 Attempt {attempt + 1}/{self.max_retries + 1} for embedding generation...")
-                
-                response = self.client.models.embed_content(
-                    model=model,
-                    contents=contents,
-                    config=config
-                )
-                
-                print(f"✅ Embedding generation successful on attempt {attempt + 1}")
-                return response
-                
+                await limiter.acquire_async()
+                if give_up_at is not None:
+                    attempt_timeout = min(timeout, give_up_at - time.monotonic())
+                    if attempt_timeout <= 0:
+                        raise asyncio.TimeoutError(f"{description} to {model} ran out of its {deadline}s deadline")
+                async with self._concurrency_limit():
+                    response = await asyncio.wait_for(request(), attempt_timeout)
             except Exception as e:
-                last_error = e
-                error_msg = str(e)
-                
-                print(f"❌ Attempt {attempt + 1} failed: {error_msg}")
-                
-                # Don't retry if it's not a retryable error
-                if not self._is_retryable_error(e):
-                    print(f"🚫 Error is not retryable, aborting: {error_msg}")
-                    break
-                
-                # Don't delay after the last attempt
-                if attempt < self.max_retries:
-                    delay = self._exponential_backoff_delay(attempt)
-                    print(f"⏳ Waiting {delay:.1f} seconds before retry...")
-                    time.sleep(delay)
-        
-        print(f"💥 All retry attempts failed. Last error: {last_error}")
-        raise last_error
+                error = e
+                # An attempt cut short by the caller's deadline says nothing about the service
+                if not (attempt_timeout < timeout and isinstance(e, asyncio.TimeoutError)):
+                    if is_server_failure(e):
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+            else:
+                breaker.record_success()
+                return response
+            finally:
+                # Also when the call is cancelled (CancelledError isn't an Exception),
+                # or the circuit would never close
+                if trial:
+                    breaker.end_trial()
+
+            delay = self._retry_delay(error, attempt)
+            out_of_time = give_up_at is not None and delay is not None and time.monotonic() + delay >= give_up_at
+            if delay is None or out_of_time or breaker.is_open():
+                print(f"❌ {description} to {model} failed after {attempt + 1} attempt(s): {error!r}")
+                raise error
+            print(f"⚠️ {description} to {model} failed (attempt {attempt + 1}/{self.max_retries + 1}): {error!r}")
+            print(f"⏳ Retrying in {delay:.1f} seconds...")
+            await asyncio.sleep(delay)
+
+    async def generate_content_with_retry(self, model, contents, config=None, timeout=None, deadline=None):
+        """
+        Generate content with automatic retry logic
+        """
+        return await self.call(
+            model,
+            lambda: self._aio().models.generate_content(model=model, contents=contents, config=config),
+            "Content generation",
+            timeout,
+            deadline,
+        )
+
+    async def embed_content_with_retry(self, model, contents, config=None, timeout=None, deadline=None):
+        """
+        Generate embeddings with automatic retry logic
+        """
+        return await self.call(
+            model,
+            lambda: self._aio().models.embed_content(model=model, contents=contents, config=config),
+            "Embedding request",
+            timeout,
+            deadline,
+        )
 
 # Example usage and test
 if __name__ == "__main__":
+    from google.genai import types
+
     print("🧪 Testing Robust GenAI Client...")
     
     # Initialize the robust client
@@ -0,0 +1,100 @@
+"""
+Content-addressed cache of generated broadcast scripts, so the same article
+set, duration, prompt and model never pay for a second LLM call
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from article_cache import DEFAULT_CACHE_DIR
+from storage import connect, evict_lru_rows, shared_instance
+
+
+def script_cache_key(articles, duration, prompt_version, model):
+    """
+    Hash everything the generated script depends on
+
+    Args:
+        articles: Dicts with 'url', 'title' and 'text' (order doesn't matter)
+        duration: Broadcast length in minutes
+        prompt_version: Bumped whenever the script prompt changes
+        model: Model that writes the script
+    """
+    article_hashes = sorted(
+        (
+            article['url'],
+            hashlib.sha256(((article.get('title') or '') + '\n' + (article.get('text') or '')).encode('utf-8')).hexdigest(),
+        )
+        for article in articles
+    )
+    payload = json.dumps({
+        'articles': article_hashes,
+        'duration': duration,
+        'prompt_version': prompt_version,
+        'model': model,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ScriptCache:
+    def __init__(self, path=None, max_entries=1000):
+        """
+        Open (or create) the script cache
+
+        Args:
+            path: SQLite file to store the cache in
+            max_entries: Scripts kept before the least recently used ones are evicted
+        """
+        self.path = path or os.path.join(DEFAULT_CACHE_DIR, 'scripts.sqlite')
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = connect(self.path)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS scripts (
+                   key TEXT PRIMARY KEY,
+                   script TEXT NOT NULL,
+                   created_at REAL NOT NULL,
+                   accessed_at REAL NOT NULL
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS scripts_accessed_at ON scripts (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key):
+        """Return the cached script for `key`, or None"""
+        with self._lock:
+            row = self._conn.execute("SELECT script FROM scripts WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE scripts SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return row[0]
+
+    def put(self, key, script):
+        """Store a generated script and evict old entries if the cache is over size"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO scripts (key, script, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, script, now, now),
+            )
+            evict_lru_rows(self._conn, 'scripts', 'key', self.max_entries)
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_caches = {}
+
+
+def get_script_cache(path=None):
+    """Return this process's shared ScriptCache for `path`, opening it on first use"""
+    path = path or os.path.join(DEFAULT_CACHE_DIR, 'scripts.sqlite')
+    return shared_instance(_caches, path, lambda: ScriptCache(path))
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+"""
+Cold-start timing report for the pipeline modules
+
+Imports each pipeline module in a fresh interpreter with `-X importtime`, the
+way api_server's pipeline workers import them (see pipeline_workers), then
+reports the wall-clock startup time and the slowest top-level imports. A
+target ending in .py is run as a script with `--help` instead, which exits
+right after imports and argument parsing. Exits with status 1 if any target
+is over its startup budget.
+
+Usage: python startup_report.py [--budget SECONDS] [--top N] [module or script.py ...]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+# The modules a pipeline worker imports when it starts
+DEFAULT_TARGETS = ['find_articles', 'generateBroadcast']
+DEFAULT_BUDGET = 1.5  # seconds
+
+
+def parse_importtime(stderr, parent=None):
+    """
+    Return [(cumulative_seconds, module)] from -X importtime output: the
+    top-level imports, or with `parent` the imports made by that module
+    """
+    imports = []
+    children = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|', 2)
+        entry = (int(cumulative) / 1e6, module.strip())
+        # Nested imports are indented under the module that triggered them,
+        # and are listed before it
+        if module.startswith(' ') and not module.startswith('  '):
+            if parent is None:
+                imports.append(entry)
+            elif entry[1] == parent:
+                imports.extend(children)
+            children = []
+        elif module.startswith('   ') and not module.startswith('    '):
+            children.append(entry)
+    return imports
+
+
+def measure(target):
+    """
+    Time a cold start of `target`. For a module, the imports listed are the
+    ones it makes itself; for a script, the script's top-level imports.
+    """
+    if target.endswith('.py'):
+        command, parent = [target, '--help'], None
+    else:
+        command, parent = ['-c', f'import {target}'], target
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime'] + command,
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+    return elapsed, result.returncode, parse_importtime(result.stderr, parent)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report cold-start import time for the pipeline modules')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET, help=f'Max startup seconds per module or script (default: {DEFAULT_BUDGET})')
+    parser.add_argument('--top', type=int, default=10, help='Number of slowest imports to list (default: 10)')
+    parser.add_argument('targets', nargs='*', default=DEFAULT_TARGETS, help=f"Modules to import, or scripts (*.py) to run with --help (default: {' '.join(DEFAULT_TARGETS)})")
+    args = parser.parse_args()
+
+    over_budget = False
+    for target in args.targets:
+        elapsed, returncode, imports = measure(target)
+        status = 'OK' if elapsed <= args.budget else 'OVER BUDGET'
+        if returncode != 0:
+            status = f'FAILED (exit {returncode})'
+        if elapsed > args.budget or returncode != 0:
+            over_budget = True
+
+        print(f"\n{target}: {elapsed:.2f}s startup (budget {args.budget:.2f}s) - {status}")
+        print(f"  total import time: {sum(seconds for seconds, _ in imports):.2f}s")
+        for seconds, module in sorted(imports, reverse=True)[:args.top]:
+            print(f"  {seconds:8.3f}s  {module}")
+
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
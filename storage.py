@@ -0,0 +1,65 @@
+"""
+Helpers shared by the on-disk stores and caches: SQLite connections shared
+by threads and worker processes, least-recently-used eviction, and one
+instance per path in each process
+"""
+
+import sqlite3
+import threading
+
+# Seconds a connection waits for another process's write before giving up
+SQLITE_TIMEOUT = 30
+
+
+def connect(path):
+    """
+    Open a SQLite database shared by every pipeline worker process. The
+    connection may be used from any thread, so callers serialize access with
+    their own lock; WAL lets readers carry on while another process writes.
+    """
+    conn = sqlite3.connect(path, timeout=SQLITE_TIMEOUT, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def evict_lru_rows(conn, table, key_column, max_entries):
+    """Delete all but the `max_entries` most recently accessed rows (by accessed_at) of `table`"""
+    conn.execute(
+        f"""DELETE FROM {table} WHERE {key_column} IN (
+                SELECT {key_column} FROM {table} ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )""",
+        (max_entries,),
+    )
+
+
+def lru_over_budget(entries, max_bytes, keep=()):
+    """
+    Return the (name, size) of the least recently used entries to remove to
+    get under max_bytes
+
+    Args:
+        entries: (last_used, name, size) tuples
+        max_bytes: Total size to get under
+        keep: Names that must not be removed (e.g. still being written)
+    """
+    total = sum(size for _, _, size in entries)
+    victims = []
+    for _, name, size in sorted(entries):
+        if total <= max_bytes:
+            break
+        if name in keep:
+            continue
+        victims.append((name, size))
+        total -= size
+    return victims
+
+
+_registry_lock = threading.Lock()
+
+
+def shared_instance(registry, key, create):
+    """Return registry[key], calling create() for it on first use, so each process opens a store once"""
+    with _registry_lock:
+        if key not in registry:
+            registry[key] = create()
+        return registry[key]
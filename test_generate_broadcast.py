@@ -0,0 +1,114 @@
+"""
+Tests for the order generateBroadcast submits script parts for synthesis in
+
+Run with: python -m pytest test_generate_broadcast.py (or python -m unittest)
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import fake_backends
+import generateBroadcast
+from article_store import ArticleStore
+
+
+class SubmissionOrderTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='briefly-test-')
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+        # Offline Gemini with no latency, and without touching the real modules for other tests
+        modules = mock.patch.dict(sys.modules)
+        modules.start()
+        self.addCleanup(modules.stop)
+        fake_backends.install()
+        environment = mock.patch.dict(os.environ, {fake_backends.ENV_LATENCY: '{"generate": 0}'})
+        environment.start()
+        self.addCleanup(environment.stop)
+
+        self.started = []
+        lock = threading.Lock()
+
+        def synthesize_part(client, part):
+            with lock:
+                self.started.append(part)
+            return b'\0\0' * 100
+
+        patch = mock.patch.object(generateBroadcast, 'synthesize_part', synthesize_part)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def store_articles(self, count=6):
+        store_path = os.path.join(self.directory, 'articles.sqlite')
+        articles = [
+            {
+                'url': f"https://example.com/news/{i}",
+                'title': f"Headline {i}",
+                'description': f"Description {i}",
+                'published date': 'Thu, 10 Jul 2025 18:06:53 GMT',
+                'publisher': 'Example News',
+                'text': f"Story {i}. " + 'Something happened today. ' * 80,
+            }
+            for i in range(count)
+        ]
+        ArticleStore(store_path).save_articles(articles)
+        return store_path, [article['url'] for article in articles]
+
+    def generate(self, progressive):
+        store_path, urls = self.store_articles()
+        output_path = os.path.join(self.directory, 'Broadcast.wav')
+        planned = []
+        real_plan = generateBroadcast.plan_script_parts
+
+        def plan_script_parts(script, duration):
+            planned.extend(real_plan(script, duration))
+            return planned
+
+        with mock.patch.object(generateBroadcast, 'plan_script_parts', plan_script_parts):
+            generateBroadcast.generate_broadcast(urls, 'test-key', duration=15, output_path=output_path,
+                                                 store_path=store_path, tts_workers=1, progressive=progressive,
+                                                 use_script_cache=False, use_tts_cache=False)
+        self.assertGreater(len(planned), 2)
+        return planned
+
+    def test_progressive_broadcast_submits_parts_in_script_order(self):
+        planned = self.generate(progressive=True)
+        self.assertEqual(self.started, [part for part, _ in planned])
+
+    def test_full_broadcast_submits_longest_parts_first(self):
+        planned = self.generate(progressive=False)
+        self.assertEqual(self.started, [part for part, _ in sorted(planned, key=lambda item: -item[1])])
+
+    def test_synthesize_parts_defaults_to_script_order(self):
+        parts = ['first', 'second', 'third']
+        pcm_parts = generateBroadcast.synthesize_parts(None, parts, max_workers=1)
+        self.assertEqual(self.started, parts)
+        self.assertEqual(len(pcm_parts), 3)
+
+
+class TTSWorkerCountTest(unittest.TestCase):
+    def test_defaults_to_every_part_up_to_the_rate_limit(self):
+        rates = {generateBroadcast.TTS_MODEL: 2.0}
+        with mock.patch.object(generateBroadcast, 'TTS_WORKERS', None), \
+                mock.patch.dict(generateBroadcast.MODEL_RATES, rates):
+            self.assertEqual(generateBroadcast.tts_worker_count(3), 3)
+            self.assertEqual(generateBroadcast.tts_worker_count(30), 2 * generateBroadcast.TTS_REQUEST_SECONDS)
+
+    def test_unlimited_model_starts_every_part(self):
+        with mock.patch.object(generateBroadcast, 'TTS_WORKERS', None), \
+                mock.patch.dict(generateBroadcast.MODEL_RATES, {generateBroadcast.TTS_MODEL: None}):
+            self.assertEqual(generateBroadcast.tts_worker_count(30), 30)
+
+    def test_fixed_worker_count(self):
+        with mock.patch.object(generateBroadcast, 'TTS_WORKERS', 4):
+            self.assertEqual(generateBroadcast.tts_worker_count(30), 4)
+            self.assertEqual(generateBroadcast.tts_worker_count(2), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
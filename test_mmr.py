@@ -0,0 +1,111 @@
+"""
+Tests that the vectorized mmr_filter picks the same articles, in the same
+order, as the nested-loop MMR it replaced
+
+Run with: python -m pytest test_mmr.py (or python -m unittest)
+"""
+
+import unittest
+
+import numpy as np
+
+from mmr import mmr_filter
+
+
+def cosine_similarity(a, b):
+    """sklearn.metrics.pairwise.cosine_similarity, for the reference below"""
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    a_norms = np.linalg.norm(a, axis=1, keepdims=True)
+    b_norms = np.linalg.norm(b, axis=1, keepdims=True)
+    a_norms[a_norms == 0] = 1.0
+    b_norms[b_norms == 0] = 1.0
+    return (a / a_norms) @ (b / b_norms).T
+
+
+def reference_mmr_filter(embeddings, query_embedding, k, lambda_param=0.5):
+    """
+    The original implementation from find-articles.py: every round re-scores
+    each remaining item. Relevance is scored one item at a time here too, so
+    identical embeddings tie exactly whatever BLAS does with a batched product.
+    """
+    selected_indices = []
+    remaining_indices = list(range(len(embeddings)))
+
+    relevance_scores = [cosine_similarity([query_embedding], [embedding])[0][0] for embedding in embeddings]
+
+    for _ in range(k):
+        if not remaining_indices:
+            break
+
+        mmr_scores = []
+        for i in remaining_indices:
+            diversity_score = 0
+            if selected_indices:
+                diversity_score = max(cosine_similarity([embeddings[i]], [embeddings[j] for j in selected_indices])[0])
+
+            mmr_score = lambda_param * relevance_scores[i] - (1 - lambda_param) * diversity_score
+            mmr_scores.append((mmr_score, i))
+
+        # max() keeps the first of equal scores, i.e. ties go to the lowest index
+        best_item_index = max(mmr_scores, key=lambda x: x[0])[1]
+
+        selected_indices.append(best_item_index)
+        remaining_indices.remove(best_item_index)
+
+    return selected_indices
+
+
+class MMRFilterTest(unittest.TestCase):
+    def assert_same_selection(self, embeddings, query, k, lambda_param):
+        expected = reference_mmr_filter(embeddings, query, k, lambda_param)
+        self.assertEqual(mmr_filter(embeddings, query, k, lambda_param), expected)
+
+    def test_random_embeddings(self):
+        rng = np.random.default_rng(0)
+        for trial in range(20):
+            with self.subTest(trial=trial):
+                n = int(rng.integers(1, 60))
+                embeddings = rng.normal(size=(n, 32))
+                query = rng.normal(size=32)
+                self.assert_same_selection(embeddings, query, 15, 0.3)
+
+    def test_lambda_and_k_range(self):
+        rng = np.random.default_rng(1)
+        embeddings = rng.normal(size=(40, 16))
+        query = rng.normal(size=16)
+        for lambda_param in (0.0, 0.3, 0.5, 0.7, 1.0):
+            for k in (0, 1, 5, 40, 50):
+                with self.subTest(lambda_param=lambda_param, k=k):
+                    self.assert_same_selection(embeddings, query, k, lambda_param)
+
+    def test_duplicate_heavy_embeddings(self):
+        # Syndicated copies: a few distinct stories, each repeated many times, so
+        # scores tie exactly and the lowest index has to win in both versions
+        rng = np.random.default_rng(2)
+        for trial in range(10):
+            with self.subTest(trial=trial):
+                stories = rng.normal(size=(int(rng.integers(2, 6)), 24))
+                picks = rng.integers(0, len(stories), size=int(rng.integers(10, 50)))
+                embeddings = stories[picks]
+                query = rng.normal(size=24)
+                self.assert_same_selection(embeddings, query, 15, 0.3)
+
+    def test_all_identical_embeddings_select_in_index_order(self):
+        embeddings = np.tile(np.array([0.2, -0.5, 0.9]), (8, 1))
+        query = np.array([1.0, 0.0, 0.0])
+        self.assertEqual(mmr_filter(embeddings, query, 5, 0.3), [0, 1, 2, 3, 4])
+        self.assert_same_selection(embeddings, query, 5, 0.3)
+
+    def test_list_input(self):
+        rng = np.random.default_rng(3)
+        embeddings = rng.normal(size=(12, 8)).tolist()
+        query = rng.normal(size=8).tolist()
+        self.assert_same_selection(embeddings, query, 6, 0.3)
+
+    def test_empty_input(self):
+        self.assertEqual(mmr_filter([], [1.0, 0.0], 15, 0.3), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+On-disk cache of synthesized TTS audio, one raw PCM file per script part,
+keyed by the normalized part text, TTS model and voice configuration
+"""
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+
+from article_cache import DEFAULT_CACHE_DIR
+from storage import lru_over_budget, shared_instance
+
+DEFAULT_TTS_CACHE_DIR = os.path.join(DEFAULT_CACHE_DIR, 'tts')
+DEFAULT_MAX_BYTES = int(os.environ.get('BRIEFLY_TTS_CACHE_MAX_BYTES', 1024 ** 3))
+
+
+def normalize_part_text(text):
+    """Collapse whitespace and drop blank lines so formatting-only differences share audio"""
+    lines = (' '.join(line.split()) for line in text.splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+def tts_cache_key(text, model, voices, prompt=''):
+    """
+    Hash everything a part's audio depends on
+
+    Args:
+        text: Script part text
+        model: TTS model
+        voices: Speaker -> voice name mapping
+        prompt: Instruction prepended to the part
+    """
+    payload = json.dumps({
+        'text': normalize_part_text(text),
+        'model': model,
+        'voices': voices,
+        'prompt': prompt,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class TTSCache:
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Args:
+            directory: Where the .pcm files are kept
+            max_bytes: Total size kept before least recently used audio is evicted
+        """
+        self.directory = directory or DEFAULT_TTS_CACHE_DIR
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.pcm')
+
+    def get(self, key):
+        """Return the cached PCM for `key`, or None"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                pcm = f.read()
+            os.utime(path)  # mtime doubles as the last access time for eviction
+        except OSError:
+            return None
+        return pcm
+
+    def put(self, key, pcm):
+        """Store PCM for `key` and evict old audio if the cache is over size"""
+        path = self._path(key)
+        # Write under a unique name and swap it in, since several worker processes share the directory
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(pcm)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used audio until under max_bytes"""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                if not name.endswith('.pcm'):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, name, stat.st_size))
+            for name, _ in lru_over_budget(entries, self.max_bytes):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+
+_caches = {}
+
+
+def get_tts_cache(directory=None):
+    """Return this process's shared TTSCache for `directory`, opening it on first use"""
+    directory = directory or DEFAULT_TTS_CACHE_DIR
+    return shared_instance(_caches, directory, lambda: TTSCache(directory))
@@ -12,6 +12,7 @@ class YourBrieflyApp {
         this.developerMode = this.checkDeveloperMode(); // Check for developer mode
         this.audioElement = null; // For real audio playback
         this.audioLoaded = false;
+        this.liveStream = false; // Playing a broadcast that is still being synthesized
         
         // New properties for section navigation
         this.topicList = []; // Array of topic names in order
@@ -356,7 +357,8 @@ class YourBrieflyApp {
     updateTotalTimeDisplay() {
         const totalTimeElement = document.getElementById('totalTime');
         if (totalTimeElement) {
-            totalTimeElement.textContent = this.formatTime(this.totalTime);
+            // A live stream's header claims the longest possible length, so there's no real total yet
+            totalTimeElement.textContent = this.liveStream ? 'LIVE' : this.formatTime(this.totalTime);
         }
     }
     
@@ -460,7 +462,9 @@ class YourBrieflyApp {
             progressBar.addEventListener('click', (e) => {
                 const rect = progressBar.getBoundingClientRect();
                 const percent = (e.clientX - rect.left) / rect.width;
-                if (this.audioLoaded && this.audioElement) {
+                if (this.liveStream) {
+                    return; // A live stream can't be seeked until the finished file replaces it
+                } else if (this.audioLoaded && this.audioElement) {
                     this.audioElement.currentTime = percent * this.totalTime;
                 } else {
                     this.currentTime = percent * this.totalTime;
@@ -470,14 +474,60 @@ class YourBrieflyApp {
         }
     }
     
-    loadAudioFile(audioUrl) {
+    loadAudioFile(audioUrl, liveStream = false) {
         if (this.audioElement) {
+            this.liveStream = liveStream;
             this.audioElement.src = audioUrl;
             this.audioElement.load();
             console.log('Loading audio from:', audioUrl);
         }
     }
     
+    // Replace a live stream with the finished file (seekable, with a known length) without cutting off playback
+    switchToFinalAudio(audioUrl) {
+        const audio = this.audioElement;
+        if (!audio) return;
+        
+        if (!audio.paused) {
+            // Swap once the stream has played out, unless another briefing has been loaded by then
+            const streamSrc = audio.src;
+            audio.addEventListener('ended', () => {
+                if (audio.src === streamSrc) this.loadAudioFile(audioUrl);
+            }, { once: true });
+            return;
+        }
+        
+        // Paused part way through: carry on from the same point in the finished file
+        const position = audio.currentTime;
+        audio.addEventListener('loadedmetadata', () => {
+            audio.currentTime = Math.min(position, audio.duration);
+            this.currentTime = audio.currentTime;
+            this.updateProgress();
+        }, { once: true });
+        this.loadAudioFile(audioUrl);
+    }
+    
+    // The smallest audio format the server can encode and this browser can play
+    async getPreferredAudioFormat() {
+        const mimeTypes = {
+            mp3: 'audio/mpeg',
+            opus: 'audio/ogg; codecs=opus',
+            wav: 'audio/wav'
+        };
+        
+        try {
+            const response = await fetch('http://localhost:5001/api/audio-formats');
+            const { formats } = await response.json();
+            const probe = this.audioElement || new Audio();
+            return Object.keys(mimeTypes).find(format =>
+                formats.includes(format) && probe.canPlayType(mimeTypes[format]) !== ''
+            ) || 'wav';
+        } catch (error) {
+            console.warn('Could not read the server\'s audio formats, using WAV:', error);
+            return 'wav';
+        }
+    }
+    
     formatTime(seconds) {
         const minutes = Math.floor(seconds / 60);
         const remainingSeconds = Math.floor(seconds % 60);
@@ -664,8 +714,8 @@ function loadHeadlinesFromExistingCSV() {
     // Show loading message
     headlinesContainer.innerHTML = '<div class="headlines-loading">🔧 Dev Mode: Loading from existing CSV...</div>';
     
-    // Load articles directly from CSV
-    loadArticlesFromCSV().then(articles => {
+    // Load articles directly from the existing CSV
+    loadArticlesFromCSV('/articles.csv').then(articles => {
         // Show processing message
         headlinesContainer.innerHTML = '<div class="headlines-loading">🔧 Dev Mode: Processing articles...</div>';
         
@@ -825,7 +875,85 @@ function proceedToHeadlines() {
     }, 800);
 }
 
-async function fetchRealArticles(topics) {
+// Start a background job on the API server (see /api/jobs/* in api_server.py)
+async function startJob(path, body) {
+    const response = await fetch('http://localhost:5001' + path, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(body)
+    });
+    
+    if (!response.ok) {
+        const errorText = await response.text();
+        console.error(`Server error (${response.status}):`, errorText);
+        throw new Error(`HTTP error! status: ${response.status} - ${errorText}`);
+    }
+    
+    return response.json();
+}
+
+// Pass each of a job's events to onEvent as it happens, and return the job's final status
+async function followJob(job, onEvent) {
+    let after = -1;
+    
+    while (true) {
+        // Long-poll: the server answers as soon as there are events after `after`
+        const response = await fetch(`http://localhost:5001${job.events_url}?after=${after}&wait=30`);
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        
+        const reply = await response.json();
+        reply.events.forEach(event => {
+            after = event.id;
+            onEvent(event);
+        });
+        
+        if (reply.finished) {
+            const statusResponse = await fetch('http://localhost:5001' + job.status_url);
+            return statusResponse.json();
+        }
+    }
+}
+
+// Headline shown in the topic sections for an article from the CSV or a job's partial results
+function articleToHeadline(article) {
+    // Handle publisher field which might be a JSON string
+    let source = 'Unknown source';
+    if (article.source) {
+        source = article.source;
+    } else if (article.publisher && typeof article.publisher === 'object') {
+        // Job results carry the publisher as parsed JSON already
+        source = article.publisher.title || 'Unknown source';
+    } else if (article.publisher) {
+        const publisherStr = article.publisher.trim();
+        try {
+            // More robust JSON validation - check if it starts and ends properly
+            if (publisherStr.startsWith('{') && publisherStr.endsWith('}')) {
+                const publisherObj = JSON.parse(publisherStr);
+                source = publisherObj.title || 'Unknown source';
+            } else {
+                source = article.publisher;
+            }
+        } catch (e) {
+            // Silent fallback - don't log every parsing error to reduce console spam
+            source = article.publisher;
+        }
+    }
+    
+    return {
+        title: article.title || 'No title',
+        source: source,
+        url: article.url || '#',
+        summary: article.summary || (article.text ? article.text.substring(0, 150) + '...' : '')
+    };
+}
+
+// Search for articles on `topics`, calling onTopic with each topic's articles as soon as they're found
+// and onProgress with the job's progress updates
+async function fetchRealArticles(topics, onTopic, onProgress) {
     try {
         // Check for API key first
         const app = window.yourBrieflyApp;
@@ -846,42 +974,29 @@ async function fetchRealArticles(topics) {
         
         showNotification('🔍 Searching for latest articles...', 'info');
         
-        // Create a longer timeout promise (25 minutes to match server)
-        const timeoutPromise = new Promise((_, reject) => {
-            setTimeout(() => reject(new Error('Request timeout after 25 minutes')), 1500000); // 25 minutes
+        // Run the search as a job (the server times it out after 25 minutes), streaming each topic's articles
+        const job = await startJob('/api/jobs/fetch-articles', {
+            topics: topics,
+            api_key: apiKey,
+            stream: true
         });
         
-        // Create the fetch promise with longer timeout
-        const fetchPromise = fetch('http://localhost:5001/api/fetch-articles', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({ 
-                topics: topics,
-                api_key: apiKey
-            })
+        const status = await followJob(job, event => {
+            if (event.event === 'partial_result' && onTopic) {
+                onTopic(event.data.data);
+            } else if (event.event === 'progress' && onProgress && event.data.message) {
+                onProgress(event.data.message);
+            }
         });
         
-        // Race between fetch and timeout
-        const response = await Promise.race([fetchPromise, timeoutPromise]);
-        
-        if (!response.ok) {
-            // Log the full error response for debugging
-            const errorText = await response.text();
-            console.error(`Server error (${response.status}):`, errorText);
-            throw new Error(`HTTP error! status: ${response.status} - ${errorText}`);
-        }
-        
-        const result = await response.json();
-        
-        if (!result.success) {
-            throw new Error(result.error || 'Unknown error occurred');
+        if (status.status !== 'succeeded') {
+            throw new Error(status.error || 'Unknown error occurred');
         }
         
         showNotification('📊 Processing article data...', 'info');
         
-        return result;
+        // { articles: <count>, csv_url: <this job's articles CSV> }
+        return status.result;
     } catch (error) {
         console.error('Error calling Python script:', error);
         
@@ -892,15 +1007,13 @@ async function fetchRealArticles(topics) {
         } else if (error.message.includes('Developer mode')) {
             console.log('🔧 Developer mode: falling back to cached headlines');
             // Don't show error notification for developer mode fallback
-        } else if (error.message.includes('Request timeout')) {
-            showNotification('⚠️ Article service is taking longer than expected. Using cached headlines.', 'warning');
         } else if (error.message.includes('Failed to fetch') || error.message.includes('NetworkError')) {
             showNotification('⚠️ Unable to connect to article service. Using cached headlines.', 'warning');
         } else if (error.message.includes('504')) {
             showNotification('⚠️ Article fetching timed out after 25 minutes. Using cached headlines.', 'warning');
         } else if (error.message.includes('500')) {
             showNotification('⚠️ Article service error. Using cached headlines.', 'warning');
-        } else if (error.message.includes('Script execution timed out')) {
+        } else if (error.message.includes('timed out')) {
             showNotification('⚠️ Article fetching timed out after 25 minutes. Using cached headlines.', 'warning');
         } else {
             showNotification('⚠️ Unable to fetch live articles. Using cached headlines.', 'warning');
@@ -923,39 +1036,77 @@ function generateHeadlinesForTopics() {
     
     console.log('🔍 Production Mode: Generating fresh headlines...');
     
-    // Show initial loading with progress updates
+    // Show loading with the job's progress updates until the first topic's headlines arrive
+    let loading = true;
     let progressStep = 0;
-    const progressMessages = [
-        'Connecting to article sources...',
-        'Searching for latest articles...',
-        'Processing article data...',
-        'Filtering relevant content...',
-        'Organizing by topics...',
-        'Finalizing your headlines...'
-    ];
     
-    function updateProgress() {
-        if (progressStep < progressMessages.length) {
-            headlinesContainer.innerHTML = `
-                <div class="headlines-loading">
-                    ${progressMessages[progressStep]}
-                    <div class="progress-dots">
-                        ${'.'.repeat((progressStep % 3) + 1)}
-                    </div>
+    function updateProgress(message) {
+        if (!loading) return;
+        headlinesContainer.innerHTML = `
+            <div class="headlines-loading">
+                ${message}
+                <div class="progress-dots">
+                    ${'.'.repeat((progressStep % 3) + 1)}
                 </div>
-            `;
-            progressStep++;
-            setTimeout(updateProgress, 8000); // Update every 8 seconds
+            </div>
+        `;
+        progressStep++;
+    }
+    
+    updateProgress('Connecting to article sources...');
+    
+    // Headlines by topic, shown as each topic's search finishes
+    let streamedHeadlines = null;
+    
+    function showStreamedTopic(record) {
+        const topic = record.topic.toLowerCase();
+        const headlines = record.articles.map(articleToHeadline);
+        if (headlines.length === 0) {
+            return; // Filled in with cached headlines once the search is over
         }
+        
+        streamedHeadlines = streamedHeadlines || {};
+        streamedHeadlines[topic] = headlines;
+        app.realHeadlines = streamedHeadlines;
+        console.log(`📰 ${topic.toUpperCase()}: ${headlines.length} articles ready`);
+        
+        if (loading) {
+            // First topic in: show the sections now; topics still being searched start empty
+            loading = false;
+            const topicsData = {};
+            Array.from(app.selectedTopics).forEach(selected => {
+                topicsData[selected] = streamedHeadlines[selected] || [];
+            });
+            createTopicSections(topicsData, true); // true = live data
+        } else {
+            app.topicData[topic] = headlines;
+            if (app.topicList[app.currentTopicIndex] === topic) {
+                app.displayCurrentTopic();
+            }
+            app.updateNavigationDisplay();
+        }
+        updateGenerateButton();
     }
     
-    updateProgress();
+    function finishStreamedTopics() {
+        Array.from(app.selectedTopics).forEach(topic => {
+            if (!streamedHeadlines[topic]) {
+                console.warn(`No articles found for topic: ${topic}`);
+                // Fallback to mock headlines for this topic
+                app.topicData[topic] = app.mockHeadlines[topic] || [];
+            }
+        });
+        app.displayCurrentTopic();
+        app.updateNavigationDisplay();
+        updateGenerateButton();
+    }
     
     // Set a much longer timeout for the entire process (25 minutes)
     const processTimeout = setTimeout(() => {
         console.log('Process timeout reached after 25 minutes, falling back to mock headlines');
         // Only clear and show mock headlines if no headlines are currently displayed
         if (headlinesContainer.innerHTML.includes('headlines-loading')) {
+            loading = false;
             headlinesContainer.innerHTML = '';
             generateMockHeadlinesForTopics();
             showNotification('📦 Process took too long. Using cached headlines for faster experience.', 'info');
@@ -965,11 +1116,19 @@ function generateHeadlinesForTopics() {
     }, 1500000); // 25 minutes
     
     // Call Python script to find articles for selected topics
-    fetchRealArticles(Array.from(app.selectedTopics))
-        .then(() => {
+    fetchRealArticles(Array.from(app.selectedTopics), showStreamedTopic, updateProgress)
+        .then((result) => {
             clearTimeout(processTimeout); // Clear timeout if successful
             console.log('Article fetching completed successfully');
             
+            if (streamedHeadlines) {
+                // Every topic's headlines already came in with the job's events
+                finishStreamedTopics();
+                showNotification('✅ Latest headlines loaded successfully!', 'success');
+                return;
+            }
+            loading = false;
+            
             // Show completion message
             headlinesContainer.innerHTML = '<div class="headlines-loading">Processing articles...</div>';
             
@@ -978,8 +1137,8 @@ function generateHeadlinesForTopics() {
                 // Clear loading message
                 headlinesContainer.innerHTML = '';
                 
-                // Read articles from CSV and populate headlines
-                loadArticlesFromCSV().then(articles => {
+                // Read this request's articles CSV and populate headlines
+                loadArticlesFromCSV(result && result.csv_url).then(articles => {
                     // Log the total number of articles loaded
                     console.log(`📊 Loaded ${articles.length} articles from CSV`);
                     
@@ -992,32 +1151,7 @@ function generateHeadlinesForTopics() {
                             articlesByTopic[topic] = [];
                         }
                         
-                        // Handle publisher field which might be a JSON string
-                        let source = 'Unknown source';
-                        if (article.source) {
-                            source = article.source;
-                        } else if (article.publisher) {
-                            const publisherStr = article.publisher.trim();
-                            try {
-                                // More robust JSON validation - check if it starts and ends properly
-                                if (publisherStr.startsWith('{') && publisherStr.endsWith('}')) {
-                                    const publisherObj = JSON.parse(publisherStr);
-                                    source = publisherObj.title || 'Unknown source';
-                                } else {
-                                    source = article.publisher;
-                                }
-                            } catch (e) {
-                                // Silent fallback - don't log every parsing error to reduce console spam
-                                source = article.publisher;
-                            }
-                        }
-                        
-                        articlesByTopic[topic].push({
-                            title: article.title || 'No title',
-                            source: source,
-                            url: article.url || '#',
-                            summary: article.summary || article.text ? article.text.substring(0, 150) + '...' : ''
-                        });
+                        articlesByTopic[topic].push(articleToHeadline(article));
                     });
                     
                     // Log article headlines grouped by topic
@@ -1075,6 +1209,13 @@ function generateHeadlinesForTopics() {
             clearTimeout(processTimeout); // Clear timeout on error
             console.error('Error fetching articles:', error);
             
+            if (streamedHeadlines) {
+                // Keep the topics that did come in; the rest get cached headlines
+                finishStreamedTopics();
+                return;
+            }
+            loading = false;
+            
             // Always fall back to mock headlines with shorter delay
             setTimeout(() => {
                 headlinesContainer.innerHTML = '';
@@ -1136,11 +1277,16 @@ function createTopicSection(topic, articles, isLive = true) {
     headlinesContainer.appendChild(topicSection);
 }
 
-// Function to read articles from CSV file
-async function loadArticlesFromCSV() {
+// Function to read articles from CSV file (csvPath is the request's csv_url)
+async function loadArticlesFromCSV(csvPath) {
     try {
+        if (!csvPath) {
+            // Never fall back to a shared articles.csv: it may hold another request's articles
+            throw new Error('The server returned no articles file for this request');
+        }
+        
         // Read the CSV file from the Flask server
-        const response = await fetch('http://localhost:5001/articles.csv');
+        const response = await fetch('http://localhost:5001' + csvPath);
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
@@ -1479,6 +1625,9 @@ function generateBriefly() {
     }
     
     async function runBroadcastGeneration(urls, originalButtonText) {
+        // Set once the first audio segment is playing from the live stream
+        let streaming = false;
+        
         try {
             if (urls.length === 0) {
                 showNotification('⚠️ No valid URLs found. Using mock content for demo.', 'warning');
@@ -1515,49 +1664,67 @@ function generateBriefly() {
             showNotification('🎙️ Generating your personalized audio broadcast...', 'info');
 
             const briefingLength = app.getBriefingLength();
+            const audioFormat = await app.getPreferredAudioFormat();
+            
+            // Run the broadcast as a job; with progressive set, its audio can be played while the rest is synthesized
+            const job = await startJob('/api/jobs/generate-broadcast', {
+                urls: urls,
+                api_key: apiKey,
+                duration: briefingLength,
+                progressive: true,
+                format: audioFormat
+            });
             
-            // Call the broadcast generation API
-            const response = await fetch('http://localhost:5001/api/generate-broadcast', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({ 
-                    urls: urls,
-                    api_key: apiKey,
-                    duration: briefingLength,
-                })
+            const status = await followJob(job, event => {
+                if (event.event === 'segment_ready' && !streaming && job.stream_url) {
+                    // The opening is ready: start the briefing from the live stream
+                    streaming = true;
+                    app.loadAudioFile('http://localhost:5001' + job.stream_url, true);
+                    showNotification('🎧 Your briefing is ready to play while the rest is generated', 'info');
+                    completeGeneration();
+                }
             });
             
-            if (!response.ok) {
-                const errorText = await response.text();
-                console.error('Broadcast generation error:', errorText);
-                throw new Error(`HTTP error! status: ${response.status}`);
+            if (status.status !== 'succeeded') {
+                throw new Error(status.error || 'Unknown error occurred');
             }
             
-            const result = await response.json();
+            if (!status.result || !status.result.audio_url) {
+                // Nothing was generated (e.g. none of the articles were found); don't play a shared or stale file
+                throw new Error('No audio was generated for this briefing');
+            }
             
-            if (result.success) {
-                showNotification('✅ Audio broadcast generated successfully!', 'success');
-                
-                // Load the generated audio file
-                const app = window.yourBrieflyApp;
-                const audioUrl = 'http://localhost:5001/Broadcast.wav?t=' + Date.now(); // Add timestamp to prevent caching
+            showNotification('✅ Audio broadcast generated successfully!', 'success');
+            
+            // Load the finished audio file (in `audioFormat`), seekable and with its full length
+            const audioUrl = 'http://localhost:5001' + status.result.audio_url + '?t=' + Date.now(); // Add timestamp to prevent caching
+            if (streaming) {
+                app.switchToFinalAudio(audioUrl);
+            } else {
                 app.loadAudioFile(audioUrl);
-                
                 completeGeneration();
-            } else {
-                throw new Error(result.error || 'Unknown error occurred');
             }
             
         } catch (error) {
             console.error('Error generating broadcast:', error);
-            showNotification('⚠️ Error generating audio broadcast. Showing demo interface.', 'warning');
+            
+            if (streaming) {
+                // The part that was streamed keeps playing; the player is already showing
+                showNotification('⚠️ The rest of the audio broadcast could not be generated.', 'warning');
+                return;
+            }
             
             // Reset button
             generateBtn.innerHTML = originalButtonText;
             generateBtn.disabled = false;
             
+            if (error.message.includes('No audio was generated')) {
+                // Leave the player empty rather than showing audio from an earlier briefing
+                showNotification('⚠️ No audio could be generated from the selected articles.', 'warning');
+                return;
+            }
+            showNotification('⚠️ Error generating audio broadcast. Showing demo interface.', 'warning');
+            
             // Still show the generated section for demo purposes
             completeGeneration();
         }